@@ -0,0 +1,27 @@
+"""
+Contains the thread-pool helper shared by the `n_workers` options of
+`plymi_mod6.numpy_functions.pairwise_dists` and `plymi_mod6.warping.warp_image`.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+__all__ = ["run_threaded"]
+
+
+def run_threaded(
+    fn: Callable[..., object], items: Iterable, n_workers: Optional[int]
+) -> None:
+    """ Calls `fn(item)` for each item, concurrently on a pool of `n_workers`
+    threads, or serially if `n_workers` is `None` or 1.
+
+    Threads suffice for parallelism here, as NumPy releases the GIL during the heavy
+    array operations performed by `fn`. Any exception raised by `fn` is re-raised."""
+    if n_workers is None or n_workers == 1:
+        for item in items:
+            fn(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        # consuming the results surfaces any exceptions raised by the workers
+        list(executor.map(fn, items))
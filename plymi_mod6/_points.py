@@ -0,0 +1,127 @@
+"""
+Contains the validation and projection helpers that are shared by
+`plymi_mod6.homography`, `plymi_mod6.transforms`, and `plymi_mod6.point_set`, all of
+which operate on shape-(N, 2) arrays of (x, y) coordinates.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+__all__ = ["invert_3x3", "project_points", "check_points", "check_out", "resolve_dtype"]
+
+
+def invert_3x3(M: np.ndarray) -> np.ndarray:
+    """
+    Computes the inverse of a (stack of) 3x3 matrices in closed form via its
+    adjugate.
+
+    Parameters
+    ----------
+    M : np.ndarray, shape=(..., 3, 3)
+
+    Returns
+    -------
+    np.ndarray, shape=(..., 3, 3)
+    """
+    (a, b, c), (d, e, f), (g, h, i) = (
+        M.tolist()
+        if M.ndim == 2
+        else [[M[..., r, k] for k in range(3)] for r in range(3)]
+    )
+    adj = [
+        [e * i - f * h, c * h - b * i, b * f - c * e],
+        [f * g - d * i, a * i - c * g, c * d - a * f],
+        [d * h - e * g, b * g - a * h, a * e - b * d],
+    ]
+    det = a * adj[0][0] + b * adj[1][0] + c * adj[2][0]
+    if M.ndim == 2:
+        return np.array(adj) / det
+    adj = np.stack([np.stack(row, axis=-1) for row in adj], axis=-2)
+    return adj / det[..., np.newaxis, np.newaxis]
+
+
+def project_points(
+    C: np.ndarray, points: np.ndarray, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Applies the projective transform C to a shape-(N, 2) array of points.
+
+    Rather than forming the shape-(3, N) array of homogeneous points, C is
+    applied as a 2x2 linear map plus a translation - written directly into
+    `out` - followed by a per-row division. Thus the only temporary is the
+    shape-(N,) array of homogeneous z-coordinates.
+
+    Parameters
+    ----------
+    C : np.ndarray, shape=(3, 3)
+    points : np.ndarray, shape=(N, 2)
+    out : Optional[np.ndarray], shape=(N, 2)
+        The array in which the result is stored; it may be `points` itself.
+        The computation is carried out in the data type of `out`.
+
+    Returns
+    -------
+    np.ndarray, shape=(N, 2)
+    """
+    if out is None:
+        out = np.empty(points.shape, dtype=points.dtype)
+    C = C.astype(out.dtype, copy=False)
+
+    # C:
+    #    [[M00, M01, t0],
+    #     [M10, M11, t1],
+    #     [ c0,  c1, c2]]
+    #
+    # z' = c0 px + c1 py + c2
+    #
+    # This must be computed before `out` is written to, as `out`
+    # is permitted to be `points`
+    z = np.matmul(points, C[2, :2])
+    z += C[2, 2]
+
+    # (x', y') = M (px, py) + t
+    np.matmul(points, C[:2, :2].T, out=out)
+    out += C[:2, 2]
+
+    # destination: (x'', y''), where
+    #            x'' = x'/z'
+    #            y'' = y'/z'
+    out /= z[:, np.newaxis]
+    return out
+
+
+def check_points(points: np.ndarray, dtype: Optional[np.dtype] = None) -> np.ndarray:
+    points = np.asarray(points, dtype=np.float64 if dtype is None else dtype)
+    if not (points.ndim == 2 and points.shape[1] == 2):
+        raise ValueError(
+            "`points` must be array-like with shape-(N, 2), got shape {}".format(
+                points.shape
+            )
+        )
+    return points
+
+
+def check_out(out: Optional[np.ndarray], points: np.ndarray) -> Optional[np.ndarray]:
+    if out is not None and not (
+        isinstance(out, np.ndarray)
+        and out.shape == points.shape
+        and out.dtype == points.dtype
+    ):
+        raise ValueError(
+            "`out` must be a numpy array with shape {} and dtype {}".format(
+                points.shape, points.dtype
+            )
+        )
+    return out
+
+
+def resolve_dtype(dtype: Optional[np.dtype], out: Optional[np.ndarray]) -> np.dtype:
+    if dtype is None:
+        dtype = np.float64 if out is None else out.dtype
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise ValueError(
+            "`dtype` must be a floating-point data type, got {}".format(dtype)
+        )
+    return dtype
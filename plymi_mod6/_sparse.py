@@ -0,0 +1,38 @@
+"""
+Contains the helpers for bucketed and sparse neighbor data that are shared by
+`plymi_mod6.numpy_functions` and `plymi_mod6.spatial`.
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numpy import ndarray
+
+__all__ = ["bucket_positions", "csr_from_pairs"]
+
+
+def bucket_positions(starts: ndarray, counts: ndarray) -> ndarray:
+    """ Expands each bucket - a run of `counts[i]` consecutive positions beginning at
+    `starts[i]` - into its positions, which are concatenated in order.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> bucket_positions(np.array([5, 0, 2]), np.array([2, 0, 3]))
+    array([5, 6, 2, 3, 4])
+    """
+    return np.arange(counts.sum()) - np.repeat(
+        np.cumsum(counts) - counts - starts, counts
+    )
+
+
+def csr_from_pairs(
+    rows: ndarray, cols: ndarray, dists: ndarray, num_rows: int
+) -> Tuple[ndarray, ndarray, ndarray]:
+    """ Converts (row, col, dist) triples into CSR form - `indptr`
+    (shape-(num_rows + 1,)), `indices`, and `dists` - with the columns of each row in
+    increasing order."""
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(num_rows + 1, dtype=np.intp)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return indptr, cols[order], dists[order]
@@ -1,57 +1,283 @@
-from typing import Tuple
+from functools import lru_cache
+from typing import Optional, Tuple
+
 import numpy as np
 
+from plymi_mod6._points import (
+    check_out,
+    check_points,
+    invert_3x3,
+    project_points,
+    resolve_dtype,
+)
 
-__all__ = ["transform_corners"]
 
+__all__ = [
+    "transform_corners",
+    "transform_corners_batch",
+    "Homography",
+    "get_homography",
+    "estimate_homography",
+    "ransac_homography",
+]
 
-def _get_cartesian_to_homogeneous_transform(
-    p1: Tuple[float, float],
-    p2: Tuple[float, float],
-    p3: Tuple[float, float],
-    p4: Tuple[float, float],
-) -> np.ndarray:
+# The maximum number of distinct corner-pairs whose `Homography` is retained
+# by `get_homography`
+HOMOGRAPHY_CACHE_SIZE = 256
+
+# Three corners are deemed to be collinear if the (doubled) area of their
+# triangle is below this value, once the corners have been normalized to
+# have unit extent along each axis
+_COLLINEAR_TOL = 1e-10
+
+
+def _normalize_corners(corners: np.ndarray) -> Tuple[tuple, tuple]:
+    """
+    Centers the corners on the origin and scales them to have unit extent along
+    each axis.
+
+    A single set of corners is converted to Python floats, for which the
+    closed-form arithmetic in `_closed_form_homography` is far cheaper than it
+    is for 0D arrays. Otherwise, each returned value is an array of shape-(...).
+
+    Parameters
+    ----------
+    corners : np.ndarray, shape=(..., 4, 2)
+
+    Returns
+    -------
+    Tuple[tuple, tuple]
+        ((x1, y1), (x2, y2), (x3, y3), (x4, y4)) - the normalized corners - and
+        (cx, cy, sx, sy) - the center and extent along each axis.
     """
-    Given a set of four 2D cartesian coordinates, produces
-    the transformation matrix that maps the following basis
+    if corners.ndim == 2:
+        x1, y1, x2, y2, x3, y3, x4, y4 = corners.ravel().tolist()
+        cx = (x1 + x2 + x3 + x4) / 4
+        cy = (y1 + y2 + y3 + y4) / 4
+        sx = (max(x1, x2, x3, x4) - min(x1, x2, x3, x4)) or 1.0
+        sy = (max(y1, y2, y3, y4) - min(y1, y2, y3, y4)) or 1.0
+    else:
+        x1, y1, x2, y2, x3, y3, x4, y4 = np.moveaxis(
+            corners.reshape(corners.shape[:-2] + (8,)), -1, 0
+        )
+        center = np.mean(corners, axis=-2)
+        extent = np.ptp(corners, axis=-2)
+        extent = np.where(extent > 0, extent, 1.0)
+        cx, cy = center[..., 0], center[..., 1]
+        sx, sy = extent[..., 0], extent[..., 1]
+
+    return (
+        ((x1 - cx) / sx, (y1 - cy) / sy),
+        ((x2 - cx) / sx, (y2 - cy) / sy),
+        ((x3 - cx) / sx, (y3 - cy) / sy),
+        ((x4 - cx) / sx, (y4 - cy) / sy),
+    ), (cx, cy, sx, sy)
+
+
+def _triangle_areas(p1: tuple, p2: tuple, p3: tuple, p4: tuple) -> tuple:
+    """
+    Computes twice the signed areas of the four triangles that can be formed
+    from four corners:
+
+        (p1, p2, p3), (p4, p2, p3), (p1, p4, p3), (p1, p2, p4)
+
+    Note that the area of the triangle (a, b, c) is half of
+
+        det([[ax, bx, cx],
+             [ay, by, cy],
+             [ 1,  1,  1]])
+
+    Parameters
+    ----------
+    p1, p2, p3, p4 : Tuple[float, float]
+        The ordered pairs (x, y) of the four corners.
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+    """
+    (x1, y1), (x2, y2), (x3, y3), (x4, y4) = p1, p2, p3, p4
+    return (
+        (x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1),
+        (x2 - x4) * (y3 - y4) - (y2 - y4) * (x3 - x4),
+        (x4 - x1) * (y3 - y1) - (y4 - y1) * (x3 - x1),
+        (x2 - x1) * (y4 - y1) - (y2 - y1) * (x4 - x1),
+    )
+
+
+def _closed_form_homography(
+    source_corners: np.ndarray, dest_corners: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the (stack of) 3x3 matrices, C, that map homogeneous
+    coordinates in the source coordinate system to those of the destination
+    coordinate system, without calling out to LAPACK.
+
+    Each set of four corners defines a matrix that maps the following basis
     to homogeneous coordinates:
            (1, 0, 0) -> Z(x1, y1, 1)
            (0, 1, 0) -> Z(x2, y2, 1)
            (0, 0, 1) -> Z(x3, y3, 1)
            (1, 1, 1) -> Z(x4, y4, 1)
 
-    Where Z is a real-valued constant
+    Namely, A' = A diag(l), where
+
+        A = [[x1, x2, x3],
+             [y1, y2, y3],
+             [ 1,  1,  1]]
+
+    and l solves A l = (x4, y4, 1). By Cramer's rule, l_k = a_k / a_0, where
+    a_0, ..., a_3 are the triangle-areas computed by `_triangle_areas`.
+    Thus A'^-1 = diag(1 / a_k) adj(A), and C = B' A'^-1 is obtained in closed
+    form.
+
+    The corners are first centered and rescaled; otherwise the closed-form
+    inverse loses precision for corners that are small relative to their
+    distance from the origin.
 
     Parameters
     ----------
-    p1 : Tuple[float, float]
-        An ordered pair (x1, y1)
-    p2 : Tuple[float, float]
-        An ordered pair (x2, y2)
-    p3 : Tuple[float, float]
-        An ordered pair (x3, y3)
-    p4 : Tuple[float, float]
-        An ordered pair (x4, y4)
+    source_corners : np.ndarray, shape=(..., 4, 2)
+    dest_corners : np.ndarray, shape=(..., 4, 2)
 
     Returns
     -------
-    np.ndarray, shape=(3, 3)
-        The transformation matrix
-    """
-    (x1, y1) = p1
-    (x2, y2) = p2
-    (x3, y3) = p3
-    (x4, y4) = p4
-    system = np.array(
-        [[x1, x2, x3, x4], [y1, y2, y3, y4], [1, 1, 1, 1]], dtype=np.float64
+    Tuple[np.ndarray, np.ndarray]
+        The shape-(..., 3, 3) transformation matrix C = B' A'^-1, and the
+        shape-(...) boolean array indicating which of the source/dest corners
+        are degenerate (i.e. three of the corners are collinear). The
+        corresponding entries of C are not meaningful.
+    """
+    src, (cx, cy, sx, sy) = _normalize_corners(source_corners)
+    dst, (Cx, Cy, Sx, Sy) = _normalize_corners(dest_corners)
+    a0, a1, a2, a3 = _triangle_areas(*src)
+    b0, b1, b2, b3 = _triangle_areas(*dst)
+    (x1, y1), (x2, y2), (x3, y3), _ = src
+    (X1, Y1), (X2, Y2), (X3, Y3), _ = dst
+
+    areas = (a0, a1, a2, a3, b0, b1, b2, b3)
+    if source_corners.ndim == 2:
+        # Python floats raise upon division by zero, thus degenerate
+        # corners must be detected up front
+        if min(map(abs, areas)) <= _COLLINEAR_TOL:
+            return np.full((3, 3), np.nan), np.array(True)
+        degenerate = np.array(False)
+        w1, w2, w3 = b1 / (b0 * a1), b2 / (b0 * a2), b3 / (b0 * a3)
+    else:
+        degenerate = np.any(np.abs(np.stack(areas)) <= _COLLINEAR_TOL, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w1, w2, w3 = b1 / (b0 * a1), b2 / (b0 * a2), b3 / (b0 * a3)
+
+    # M = diag(b_k / b_0) diag(1 / a_k) adj(A)
+    m10, m11, m12 = w1 * (y2 - y3), w1 * (x3 - x2), w1 * (x2 * y3 - x3 * y2)
+    m20, m21, m22 = w2 * (y3 - y1), w2 * (x1 - x3), w2 * (x3 * y1 - x1 * y3)
+    m30, m31, m32 = w3 * (y1 - y2), w3 * (x2 - x1), w3 * (x1 * y2 - x2 * y1)
+
+    # C = B M, followed by undoing the normalization: C <- N_dest^-1 C N_source,
+    # where
+    #
+    #     N = [[1/sx,    0, -cx/sx],
+    #          [   0, 1/sy, -cy/sy],
+    #          [   0,    0,      1]]
+    rows = []
+    for u1, u2, u3 in ((X1, X2, X3), (Y1, Y2, Y3), (1.0, 1.0, 1.0)):
+        c0 = (u1 * m10 + u2 * m20 + u3 * m30) / sx
+        c1 = (u1 * m11 + u2 * m21 + u3 * m31) / sy
+        c2 = u1 * m12 + u2 * m22 + u3 * m32 - c0 * cx - c1 * cy
+        rows.append((c0, c1, c2))
+    (c00, c01, c02), (c10, c11, c12), (c20, c21, c22) = rows
+    C = (
+        (Sx * c00 + Cx * c20, Sx * c01 + Cx * c21, Sx * c02 + Cx * c22),
+        (Sy * c10 + Cy * c20, Sy * c11 + Cy * c21, Sy * c12 + Cy * c22),
+        (c20, c21, c22),
     )
-    A = system[:, :3]
-    b = system[:, 3]
-    return A * np.linalg.solve(A, b)
+
+    if source_corners.ndim == 2:
+        return np.array(C), degenerate
+    return np.stack([np.stack(row, axis=-1) for row in C], axis=-2), degenerate
+
+
+def _get_homography_matrix(
+    source_corners: np.ndarray, dest_corners: np.ndarray
+) -> np.ndarray:
+    """
+    Produces the (stack of) 3x3 matrices, C, that map homogeneous
+    coordinates in the source coordinate system to those of the destination
+    coordinate system.
+
+    Parameters
+    ----------
+    source_corners : np.ndarray, shape=(..., 4, 2)
+    dest_corners : np.ndarray, shape=(..., 4, 2)
+
+    Returns
+    -------
+    np.ndarray, shape=(..., 3, 3)
+        The transformation matrix C
+
+    Raises
+    ------
+    ValueError
+        Three of the four source or destination corners are collinear.
+    """
+    C, degenerate = _closed_form_homography(source_corners, dest_corners)
+    if degenerate.any():
+        if degenerate.ndim == 0:
+            raise ValueError(
+                "Three of the four source or destination corners are collinear; "
+                "they do not specify a valid projective transform"
+            )
+        raise ValueError(
+            "Three of the four source or destination corners are collinear for the "
+            "corners at index/indices {}; these do not specify a valid projective "
+            "transform".format(np.argwhere(degenerate).tolist())
+        )
+    return C
+
+
+def _project_points_stack(C: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Applies each of a stack of K projective transforms to its own shape-(N, 2)
+    array of points, or to a single, shared array of points.
+
+    Parameters
+    ----------
+    C : np.ndarray, shape=(K, 3, 3)
+    points : np.ndarray, shape=(K, N, 2) or shape=(N, 2)
+
+    Returns
+    -------
+    np.ndarray, shape=(K, N, 2)
+    """
+    # z': shape-(K, N)
+    z = np.matmul(points, C[:, 2, :2, np.newaxis])[..., 0]
+    z += C[:, 2, 2, np.newaxis]
+
+    # (x', y'): shape-(K, N, 2)
+    out = np.matmul(points, np.swapaxes(C[:, :2, :2], -1, -2))
+    out += C[:, np.newaxis, :2, 2]
+    out /= z[..., np.newaxis]
+    return out
+
+
+def _check_corners(corners: np.ndarray, name: str) -> np.ndarray:
+    corners = np.asarray(corners, dtype=np.float64)
+    if corners.shape != (4, 2):
+        raise ValueError(
+            "`{}` must be array-like with shape-(4, 2), got shape {}".format(
+                name, corners.shape
+            )
+        )
+    return corners
 
 
 def transform_corners(
-    points: np.ndarray, *, source_corners: np.ndarray, dest_corners: np.ndarray
+    points: np.ndarray,
+    *,
+    source_corners: np.ndarray,
+    dest_corners: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    dtype: Optional[np.dtype] = None
 ) -> np.ndarray:
     """ Perform a projective transform on a sequence of 2D points,
     given four corners of a plane in the source coordinate system,
@@ -69,6 +295,16 @@ def transform_corners(
         The corresponding ordered pairs for the four corners of the destination
         coordinate system.
 
+    out : Optional[numpy.ndarray], shape=(N, 2)
+        If specified, the projected points are written to this array, which
+        is then returned. `out` may be `points` itself, in which case the
+        transform is performed in-place.
+
+    dtype : Optional[numpy.dtype]
+        The floating-point data type in which the projection is carried out
+        (e.g. `numpy.float32`). Defaults to the data type of `out`, or
+        float-64 if `out` is not specified.
+
     Returns
     -------
     numpy.ndarray, shape=(N, 2)
@@ -83,45 +319,534 @@ def transform_corners(
     >>> points = np.array([[0.5, 0.5]])  # center of original corners
     >>> transform_corners(points, source_corners=original_coords, dest_corners=new_coords)
     array([[2., 1.]])
+
+    Performing the projection in single-precision
+
+    >>> transform_corners(
+    ...     points,
+    ...     source_corners=original_coords,
+    ...     dest_corners=new_coords,
+    ...     dtype=np.float32,
+    ... )
+    array([[2., 1.]], dtype=float32)
     """
-    points = np.asarray(points, dtype=np.float64)
-    if not (points.ndim == 2 and points.shape[1] == 2):
+    dtype = resolve_dtype(dtype, out)
+    points = check_points(points, dtype)
+    out = check_out(out, points)
+    source_corners = _check_corners(source_corners, "source_corners")
+    dest_corners = _check_corners(dest_corners, "dest_corners")
+
+    C = _get_homography_matrix(source_corners, dest_corners)
+    return project_points(C, points, out=out)
+
+
+def transform_corners_batch(
+    points: np.ndarray,
+    *,
+    source_corners: np.ndarray,
+    dest_corners: np.ndarray,
+    frame_index: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """ Perform K projective transforms - each specified by its own pair
+    of source and destination corners - in a single vectorized pass.
+
+    This is equivalent to calling `transform_corners` once per pair of
+    corners, but it avoids the per-call overhead of solving each system
+    individually.
+
+    Parameters
+    ----------
+    points : array_like, shape=(K, N, 2) or shape=(P, 2)
+        If `frame_index` is not specified, `points[k]` is the sequence of N
+        ordered pairs that undergo the k-th projective transform.
+
+        Otherwise, `points` is a "ragged" sequence of P ordered pairs, and
+        `points[p]` undergoes the projective transform `frame_index[p]`.
+
+    source_corners : array_like, shape=(K, 4, 2)
+        The ordered pairs for the four corners of each of the K original
+        coordinate systems.
+
+    dest_corners : array_like, shape=(K, 4, 2)
+        The corresponding ordered pairs for the four corners of each of the
+        K destination coordinate systems.
+
+    frame_index : Optional[array_like], shape=(P,)
+        The integer-valued index, in [0, K), of the projective transform to
+        which each of the P points belongs.
+
+    Returns
+    -------
+    numpy.ndarray, shape=(K, N, 2) or shape=(P, 2)
+        The projected points.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> original_coords = np.array([[0., 0.], [1., 0.], [1., 1.], [0., 1.]])
+    >>> source_corners = np.stack([original_coords, original_coords])
+    >>> # frame-0: dilated by 2x; frame-1: all x-coordinates shifted by +1
+    >>> dest_corners = np.stack([2. * original_coords, original_coords + [1., 0.]])
+    >>> points = np.array([[[0.5, 0.5]], [[0.5, 0.5]]])
+    >>> transform_corners_batch(points, source_corners=source_corners, dest_corners=dest_corners)
+    array([[[1. , 1. ]],
+    <BLANKLINE>
+           [[1.5, 0.5]]])
+    """
+    source_corners = np.asarray(source_corners, dtype=np.float64)
+    dest_corners = np.asarray(dest_corners, dtype=np.float64)
+
+    if not (
+        source_corners.ndim == 3
+        and source_corners.shape[1:] == (4, 2)
+        and source_corners.shape == dest_corners.shape
+    ):
         raise ValueError(
-            "`points` must be array-like with shape-(N, 2), got shape {}".format(
-                points.shape
+            "`source_corners` and `dest_corners` must be array-like with the "
+            "same shape-(K, 4, 2), got shapes {} and {}".format(
+                source_corners.shape, dest_corners.shape
             )
         )
 
-    source_corners = np.asarray(source_corners)
+    points = np.asarray(points, dtype=np.float64)
+
+    if frame_index is None:
+        if not (
+            points.ndim == 3
+            and points.shape[0] == source_corners.shape[0]
+            and points.shape[2] == 2
+        ):
+            raise ValueError(
+                "`points` must be array-like with shape-(K, N, 2), where K={}, "
+                "got shape {}".format(source_corners.shape[0], points.shape)
+            )
+    else:
+        frame_index = np.asarray(frame_index)
+        if not (
+            points.ndim == 2
+            and points.shape[1] == 2
+            and frame_index.shape == points.shape[:1]
+        ):
+            raise ValueError(
+                "`points` must be array-like with shape-(P, 2) and `frame_index` "
+                "must be array-like with shape-(P,), got shapes {} and {}".format(
+                    points.shape, frame_index.shape
+                )
+            )
+        num_frames = source_corners.shape[0]
+        if frame_index.size and not (
+            np.issubdtype(frame_index.dtype, np.integer)
+            and frame_index.min() >= 0
+            and frame_index.max() < num_frames
+        ):
+            raise ValueError(
+                "`frame_index` must contain integers in [0, {}), got {}".format(
+                    num_frames, frame_index
+                )
+            )
+
+    C = _get_homography_matrix(source_corners, dest_corners)
+
+    if frame_index is None:
+        return _project_points_stack(C, points)
 
-    # convert points to latitude/longitude
-    A = _get_cartesian_to_homogeneous_transform(
-        source_corners[0], source_corners[1], source_corners[2], source_corners[3]
+    C = C[frame_index]  # shape-(P, 3, 3)
+    homogeneous_pts = np.einsum("pij,pj->pi", C[:, :, :2], points)
+    homogeneous_pts += C[:, :, 2]
+    return homogeneous_pts[..., :2] / homogeneous_pts[..., 2:]
+
+
+class Homography:
+    """ A projective transform between two 2D coordinate systems, whose 3x3
+    matrix is computed once - upon construction - and can then be applied to
+    any number of sequences of points.
+
+    Parameters
+    ----------
+    source_corners : array_like, shape=(4, 2)
+        The ordered pairs for the four corners of the original coordinate system.
+
+    dest_corners : array_like, shape=(4, 2)
+        The corresponding ordered pairs for the four corners of the destination
+        coordinate system.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> original_coords = np.array([[0., 0.], [1., 0.], [1., 1.], [0., 1.]])
+    >>> # all distances dilated by 2x and all x-coordinates shifted by +1
+    >>> new_coords = 2. * original_coords + np.array([1., 0])
+    >>> homography = Homography(original_coords, new_coords)
+    >>> homography.apply([[0.5, 0.5]])
+    array([[2., 1.]])
+    >>> homography.inverse().apply([[2., 1.]])
+    array([[0.5, 0.5]])
+    """
+
+    def __init__(self, source_corners: np.ndarray, dest_corners: np.ndarray):
+        source_corners = _check_corners(source_corners, "source_corners")
+        dest_corners = _check_corners(dest_corners, "dest_corners")
+        self._matrix = _get_homography_matrix(source_corners, dest_corners)
+        self._matrix.flags.writeable = False
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> "Homography":
+        """ Creates a homography directly from its 3x3 matrix.
+
+        Parameters
+        ----------
+        matrix : array_like, shape=(3, 3)
+            The matrix that maps homogeneous source coordinates to
+            homogeneous destination coordinates.
+
+        Returns
+        -------
+        Homography
+        """
+        matrix = np.array(matrix, dtype=np.float64)
+        if matrix.shape != (3, 3):
+            raise ValueError(
+                "`matrix` must be array-like with shape-(3, 3), got shape {}".format(
+                    matrix.shape
+                )
+            )
+        out = cls.__new__(cls)
+        out._matrix = matrix
+        out._matrix.flags.writeable = False
+        return out
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """ The (read-only) shape-(3, 3) matrix of the projective transform."""
+        return self._matrix
+
+    def apply(
+        self,
+        points: np.ndarray,
+        *,
+        out: Optional[np.ndarray] = None,
+        dtype: Optional[np.dtype] = None
+    ) -> np.ndarray:
+        """ Perform the projective transform on a sequence of 2D points.
+
+        Parameters
+        ----------
+        points : array_like, shape=(N, 2)
+            A sequence of ordered pairs to undergo the projective transform.
+
+        out : Optional[numpy.ndarray], shape=(N, 2)
+            If specified, the projected points are written to this array, which
+            is then returned. `out` may be `points` itself.
+
+        dtype : Optional[numpy.dtype]
+            The floating-point data type in which the projection is carried
+            out. Defaults to the data type of `out`, or float-64 if `out` is
+            not specified.
+
+        Returns
+        -------
+        numpy.ndarray, shape=(N, 2)
+            The array of N projected points.
+        """
+        dtype = resolve_dtype(dtype, out)
+        points = check_points(points, dtype)
+        return project_points(self._matrix, points, out=check_out(out, points))
+
+    def inverse(self) -> "Homography":
+        """ Returns the homography that maps destination coordinates back
+        to source coordinates.
+
+        Returns
+        -------
+        Homography
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inverse = invert_3x3(self._matrix)
+        if not np.all(np.isfinite(inverse)):
+            raise ValueError("The homography is singular and cannot be inverted")
+        return type(self).from_matrix(inverse)
+
+    def __repr__(self) -> str:
+        return "{}.from_matrix({})".format(
+            type(self).__name__, np.array2string(self._matrix, separator=", ")
+        )
+
+
+@lru_cache(maxsize=HOMOGRAPHY_CACHE_SIZE)
+def _cached_homography(source_bytes: bytes, dest_bytes: bytes) -> Homography:
+    return Homography(
+        np.frombuffer(source_bytes, dtype=np.float64).reshape(4, 2),
+        np.frombuffer(dest_bytes, dtype=np.float64).reshape(4, 2),
     )
-    A_inv = np.linalg.inv(A)
 
-    B = _get_cartesian_to_homogeneous_transform(
-        dest_corners[0], dest_corners[1], dest_corners[2], dest_corners[3]
+
+def get_homography(source_corners: np.ndarray, dest_corners: np.ndarray) -> Homography:
+    """ Returns the `Homography` for the given corners, reusing a previously
+    constructed instance when the same corners have been seen recently.
+
+    The most recently-used `HOMOGRAPHY_CACHE_SIZE` homographies are retained,
+    keyed on the bytes of the float-64 corners. Statistics for the cache
+    are reported by `get_homography.cache_info()`, and the cache can be emptied
+    via `get_homography.cache_clear()`.
+
+    Parameters
+    ----------
+    source_corners : array_like, shape=(4, 2)
+        The ordered pairs for the four corners of the original coordinate system.
+
+    dest_corners : array_like, shape=(4, 2)
+        The corresponding ordered pairs for the four corners of the destination
+        coordinate system.
+
+    Returns
+    -------
+    Homography
+    """
+    source_corners = _check_corners(source_corners, "source_corners")
+    dest_corners = _check_corners(dest_corners, "dest_corners")
+    return _cached_homography(
+        np.ascontiguousarray(source_corners).tobytes(),
+        np.ascontiguousarray(dest_corners).tobytes(),
+    )
+
+
+get_homography.cache_info = _cached_homography.cache_info
+get_homography.cache_clear = _cached_homography.cache_clear
+
+
+def _check_correspondences(
+    source_points: np.ndarray, dest_points: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    source_points = np.asarray(source_points, dtype=np.float64)
+    dest_points = np.asarray(dest_points, dtype=np.float64)
+    if not (
+        source_points.ndim == 2
+        and source_points.shape[1] == 2
+        and source_points.shape == dest_points.shape
+        and source_points.shape[0] >= 4
+    ):
+        raise ValueError(
+            "`source_points` and `dest_points` must be array-like with the same "
+            "shape-(N, 2), where N >= 4, got shapes {} and {}".format(
+                source_points.shape, dest_points.shape
+            )
+        )
+    return source_points, dest_points
+
+
+def _similarity_normalization(points: np.ndarray) -> np.ndarray:
+    """
+    Produces the 3x3 matrix that translates the points' centroid to the origin
+    and isotropically scales them to have a mean distance of sqrt(2) from it.
+
+    Parameters
+    ----------
+    points : np.ndarray, shape=(N, 2)
+
+    Returns
+    -------
+    np.ndarray, shape=(3, 3)
+    """
+    center = np.mean(points, axis=0)
+    mean_dist = np.mean(np.sqrt(np.sum((points - center) ** 2, axis=1)))
+    scale = np.sqrt(2) / mean_dist if mean_dist > 0 else 1.0
+    return np.array(
+        [
+            [scale, 0.0, -scale * center[0]],
+            [0.0, scale, -scale * center[1]],
+            [0.0, 0.0, 1.0],
+        ]
     )
 
-    # maps: new-corners (homogeneous-basis) <- cartesian-basis <- old-corners
-    C = np.matmul(B, A_inv)
-
-    # source_pts:
-    #          [[px1, px2, ...]
-    #           [py1, py2, ...],
-    #           [  1,   1, ...]]
-    num_pts = points.shape[0]
-    source_pts = np.hstack([points, np.ones((num_pts, 1))]).T
-
-    # homogeneous_pts:
-    #          [[x1', y1', z1'],
-    #           [x2', y2', z2'],
-    #            ...]
-    homogeneous_pts = np.matmul(C, source_pts).T
-
-    # destination: (x'', y''), where
-    #            x'' = x'/z'
-    #            y'' = y'/z'
-    z = homogeneous_pts[:, (2,)]  # shape-(N, 1)
-    return homogeneous_pts[:, :2] / z
+
+def _direct_linear_transform(
+    source_points: np.ndarray, dest_points: np.ndarray
+) -> np.ndarray:
+    """
+    Computes the homography that best maps `source_points` to `dest_points`
+    in the least-squares sense (the "normalized DLT" algorithm).
+
+    Parameters
+    ----------
+    source_points : np.ndarray, shape=(N, 2)
+    dest_points : np.ndarray, shape=(N, 2)
+
+    Returns
+    -------
+    np.ndarray, shape=(3, 3)
+
+    Raises
+    ------
+    ValueError
+        The correspondences do not determine a unique homography (e.g. the
+        points are collinear).
+    """
+    source_norm = _similarity_normalization(source_points)
+    dest_norm = _similarity_normalization(dest_points)
+    x, y = project_points(source_norm, source_points).T
+    u, v = project_points(dest_norm, dest_points).T
+
+    # Each correspondence (x, y) -> (u, v) contributes two rows to the
+    # system: A h = 0, where h contains the flattened entries of C
+    zeros, ones = np.zeros_like(x), np.ones_like(x)
+    A = np.empty((2 * len(x), 9))
+    A[0::2] = np.stack([-x, -y, -ones, zeros, zeros, zeros, u * x, u * y, u], axis=1)
+    A[1::2] = np.stack([zeros, zeros, zeros, -x, -y, -ones, v * x, v * y, v], axis=1)
+
+    # h is the right-singular vector associated with the smallest singular value.
+    # Only for N=4 - i.e. 8 rows - is the full SVD needed to obtain all 9 of the
+    # right-singular vectors; otherwise, the (2N, 2N) left-singular vectors of
+    # the full SVD are needlessly costly to compute
+    _, singular_values, vh = np.linalg.svd(A, full_matrices=len(A) < 9)
+    if singular_values[7] <= _COLLINEAR_TOL * singular_values[0]:
+        raise ValueError(
+            "The correspondences do not determine a unique homography; "
+            "the points may be collinear"
+        )
+    C = vh[-1].reshape(3, 3)
+    return np.matmul(invert_3x3(dest_norm), np.matmul(C, source_norm))
+
+
+def estimate_homography(
+    source_points: np.ndarray, dest_points: np.ndarray
+) -> Homography:
+    """ Estimates the projective transform that best maps each of N >= 4
+    source points to its corresponding destination point, in the least-squares
+    sense.
+
+    Parameters
+    ----------
+    source_points : array_like, shape=(N, 2)
+        Ordered pairs in the original coordinate system.
+
+    dest_points : array_like, shape=(N, 2)
+        The corresponding ordered pairs in the destination coordinate system.
+
+    Returns
+    -------
+    Homography
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> source_points = np.array([[0., 0.], [1., 0.], [1., 1.], [0., 1.], [.5, .5]])
+    >>> # all distances dilated by 2x and all x-coordinates shifted by +1
+    >>> dest_points = 2. * source_points + np.array([1., 0])
+    >>> homography = estimate_homography(source_points, dest_points)
+    >>> np.round(homography.apply([[0.25, 0.25]]), 6)
+    array([[1.5, 0.5]])
+    """
+    source_points, dest_points = _check_correspondences(source_points, dest_points)
+    return Homography.from_matrix(_direct_linear_transform(source_points, dest_points))
+
+
+def _find_inliers(
+    C: np.ndarray, source_points: np.ndarray, dest_points: np.ndarray, threshold: float
+) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        projected = project_points(C, source_points)
+        return np.sum((projected - dest_points) ** 2, axis=1) <= threshold ** 2
+
+
+def ransac_homography(
+    source_points: np.ndarray,
+    dest_points: np.ndarray,
+    *,
+    threshold: float,
+    max_iters: int = 1000,
+    batch_size: int = 256,
+    seed: Optional[int] = None
+) -> Tuple[Homography, np.ndarray]:
+    """ Robustly estimates the projective transform between two sets of
+    corresponding points, a fraction of which may be outliers.
+
+    Candidate homographies are computed from random subsets of four
+    correspondences; `batch_size` candidates at a time are computed, and
+    scored against all of the correspondences, in a single vectorized pass.
+    The candidate with the most inliers is then refined via least-squares
+    (see `estimate_homography`) over all of its inliers.
+
+    Parameters
+    ----------
+    source_points : array_like, shape=(N, 2)
+        Ordered pairs in the original coordinate system, where N >= 4.
+
+    dest_points : array_like, shape=(N, 2)
+        The corresponding ordered pairs in the destination coordinate system.
+
+    threshold : float
+        A correspondence is an inlier if its projected source point lies within
+        this distance of its destination point.
+
+    max_iters : int, optional (default=1000)
+        The number of candidate homographies that are evaluated.
+
+    batch_size : int, optional (default=256)
+        The number of candidates that are evaluated at once. Memory consumption
+        scales as `batch_size * N`.
+
+    seed : Optional[int]
+        Seeds the random selection of correspondences, for reproducible results.
+
+    Returns
+    -------
+    Tuple[Homography, numpy.ndarray]
+        The estimated homography, and the shape-(N,) boolean array that
+        indicates which of the correspondences are its inliers.
+
+    Raises
+    ------
+    ValueError
+        No four correspondences yield a non-degenerate homography.
+    """
+    source_points, dest_points = _check_correspondences(source_points, dest_points)
+    if max_iters < 1 or batch_size < 1:
+        raise ValueError("`max_iters` and `batch_size` must be positive integers")
+
+    rng = np.random.RandomState(seed)
+    num_points = len(source_points)
+    best_C, best_count = None, 0
+
+    for start in range(0, max_iters, batch_size):
+        num_candidates = min(batch_size, max_iters - start)
+
+        # samples: shape-(K, 4) - four distinct correspondences per candidate
+        samples = np.argpartition(rng.rand(num_candidates, num_points), 3, axis=1)
+        samples = samples[:, :4]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            C, degenerate = _closed_form_homography(
+                source_points[samples], dest_points[samples]
+            )
+            projected = _project_points_stack(C, source_points)  # (K, N, 2)
+            sq_errors = np.sum((projected - dest_points) ** 2, axis=-1)
+
+        counts = np.sum(sq_errors <= threshold ** 2, axis=1)  # nan -> not an inlier
+        counts[degenerate] = 0
+
+        best = np.argmax(counts)
+        if counts[best] > best_count:
+            best_C, best_count = C[best], counts[best]
+
+    if best_C is None:
+        raise ValueError(
+            "None of the sampled correspondences produced a valid homography"
+        )
+
+    inliers = _find_inliers(best_C, source_points, dest_points, threshold)
+    if np.count_nonzero(inliers) > 4:
+        try:
+            refined = _direct_linear_transform(
+                source_points[inliers], dest_points[inliers]
+            )
+        except ValueError:
+            refined = None
+
+        if refined is not None:
+            refined_inliers = _find_inliers(
+                refined, source_points, dest_points, threshold
+            )
+            if np.count_nonzero(refined_inliers) >= np.count_nonzero(inliers):
+                best_C, inliers = refined, refined_inliers
+
+    return Homography.from_matrix(best_C), inliers
@@ -1,36 +1,1256 @@
+import os
+
 import numpy as np
 
-__all__ = ["pairwise_dists"]
+from plymi_mod6._parallel import run_threaded
+from plymi_mod6._sparse import bucket_positions, csr_from_pairs
+
+__all__ = [
+    "pairwise_dists",
+    "pairwise_reduce",
+    "knn",
+    "pairs_within",
+    "iter_pairs_within",
+    "pdist",
+    "condensed_index",
+    "squareform",
+    "ReferenceIndex",
+    "LSHIndex",
+]
+
+# The default number of bytes that the scratch space of a blocked
+# distance computation may occupy. Small, cache-friendly blocks are
+# faster than a single, monolithic block
+DEFAULT_MEMORY_BUDGET = 2 ** 22
+
+# The number of rows that a block spans, when the budget permits, even if
+# this means that a block cannot span entire rows. Otherwise, for a large
+# number of columns, each block degenerates into a matrix-vector product
+# and `y` is re-read once per row of `x`
+MIN_BLOCK_ROWS = 128
+
+# The relative error that is tolerated in the distances computed with
+# `precision="float32"`; distances whose estimated error exceeds this are
+# recomputed in float-64
+FLOAT32_RTOL = 1e-5
+
+_PRECISIONS = ("float32", "float64")
+
+
+def _check_pair(x, y):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x.ndim != 2 or y.ndim != 2 or x.shape[1] != y.shape[1]:
+        raise ValueError(
+            "`x` and `y` must be shape-(M, D) and shape-(N, D) arrays, "
+            "got shapes {} and {}".format(x.shape, y.shape)
+        )
+    return x, y
+
+
+def _sq_norms(x):
+    """ Returns the squared Euclidean norm of each row of `x`."""
+    return np.einsum("ij,ij->i", x, x)
+
+
+def _cast(x, dtype, offset=None):
+    """ Casts `x` to `dtype`, after subtracting `offset` from its rows."""
+    if offset is not None:
+        x = x - offset
+    return x.astype(dtype, copy=False)
+
+
+def _blocked_sq_norms(y, blocks, dtype, offset=None):
+    """ Computes the squared norms of the rows of `y - offset`, casting
+    only one block of rows to `dtype` at a time."""
+    return np.concatenate(
+        [np.empty(0, dtype=dtype)]
+        + [_sq_norms(_cast(y[rows], dtype, offset)) for rows in blocks]
+    )
+
+
+def _block_shape(num_rows, num_cols, itemsize, memory_budget):
+    """ Returns the (rows, cols) shape of the largest block of a
+    (num_rows, num_cols) matrix that fits in `memory_budget` bytes.
+    Blocks span entire rows whenever this leaves room for at least
+    `MIN_BLOCK_ROWS` of them."""
+    if memory_budget is None:
+        memory_budget = DEFAULT_MEMORY_BUDGET
+    if memory_budget < 1:
+        raise ValueError(
+            "`memory_budget` must be a positive number of bytes, "
+            "got {}".format(memory_budget)
+        )
+    max_items = max(1, int(memory_budget) // itemsize)
+    min_rows = max(1, min(num_rows, MIN_BLOCK_ROWS, max_items))
+    block_cols = max(1, min(num_cols, max_items // min_rows))
+    block_rows = max(1, min(num_rows, max_items // block_cols))
+    return block_rows, block_cols
+
+
+def _sqeuclidean_block(x, y, x_sq_norms, y_sq_norms, out):
+    """ Computes the squared Euclidean distances between the rows of `x`
+    and `y` into `out`, performing every step in place."""
+    np.matmul(x, y.T, out=out)
+    out *= -2
+    out += x_sq_norms[:, np.newaxis]
+    out += y_sq_norms
+
+    # It is possible that entries in `x` and `y` are very similar.
+    # Subtracting two very similar numbers will lead to large numerical
+    # precision errors. So even though it should be mathematically
+    # impossible for `out` to contain negative numbers, this can actually
+    # happen! Thus we clip `out` to make sure all very-small negative
+    # numbers are set to 0.
+    np.maximum(out, 0.0, out=out)
+    return out
+
+
+def _euclidean_block(x, y, x_sq_norms, y_sq_norms, out):
+    """ Computes the Euclidean distances between the rows of `x` and
+    `y` into `out`, performing every step in place."""
+    _sqeuclidean_block(x, y, x_sq_norms, y_sq_norms, out)
+    np.sqrt(out, out=out)
+    return out
+
+
+def _safe_norms(sq_norms):
+    """ Returns the norms corresponding to `sq_norms`, with zeros replaced
+    by ones so that they can be divided by."""
+    return np.where(sq_norms > 0, np.sqrt(sq_norms), 1).astype(sq_norms.dtype)
+
+
+def _cosine_block(x, y, x_sq_norms, y_sq_norms, out):
+    """ Computes the cosine distances between the rows of `x` and `y`
+    into `out`, performing every step in place."""
+    np.matmul(x, y.T, out=out)
+    out /= _safe_norms(x_sq_norms)[:, np.newaxis]
+    out /= _safe_norms(y_sq_norms)
+    np.subtract(1, out, out=out)
+    # rounding can carry the cosine similarity slightly outside of [-1, 1]
+    np.clip(out, 0.0, 2.0, out=out)
+    return out
+
+
+def _feature_wise_block(x, y, out, accumulate):
+    """ Accumulates the absolute differences between the rows of `x` and
+    `y` into `out`, one feature at a time, so that only a single
+    block-sized temporary - rather than an (M, N, D) array - is needed."""
+    out.fill(0)
+    diffs = np.empty_like(out)
+    for d in range(x.shape[1]):
+        np.subtract(x[:, d, np.newaxis], y[:, d], out=diffs)
+        np.abs(diffs, out=diffs)
+        accumulate(out, diffs, out=out)
+    return out
+
+
+def _manhattan_block(x, y, x_sq_norms, y_sq_norms, out):
+    """ Computes the Manhattan (L1) distances between the rows of `x` and
+    `y` into `out`."""
+    return _feature_wise_block(x, y, out, np.add)
+
 
+def _chebyshev_block(x, y, x_sq_norms, y_sq_norms, out):
+    """ Computes the Chebyshev (L-infinity) distances between the rows of
+    `x` and `y` into `out`."""
+    return _feature_wise_block(x, y, out, np.maximum)
 
-def pairwise_dists(x, y):
+
+# Maps each supported metric to the function that computes a block of
+# its distances. Those in `_NORM_METRICS` are computed via matrix
+# multiplication, and require the squared norms of the rows of `x` and `y`
+_METRICS = {
+    "euclidean": _euclidean_block,
+    "sqeuclidean": _sqeuclidean_block,
+    "cosine": _cosine_block,
+    "manhattan": _manhattan_block,
+    "chebyshev": _chebyshev_block,
+}
+_NORM_METRICS = {"euclidean", "sqeuclidean", "cosine"}
+
+
+def _check_metric(metric):
+    if metric not in _METRICS:
+        raise ValueError(
+            "`metric` must be one of {}, got {!r}".format(", ".join(_METRICS), metric)
+        )
+
+
+def _block_itemsize(dtype, metric):
+    """ Returns the number of bytes of scratch space needed per entry of
+    a block of distances."""
+    # feature-wise metrics need a temporary the size of the block
+    return dtype.itemsize * (1 if metric in _NORM_METRICS else 2)
+
+
+def _iter_dist_blocks(
+    x,
+    y,
+    memory_budget,
+    y_sq_norms=None,
+    out=None,
+    metric="euclidean",
+    dtype=None,
+    offset=None,
+    block_cols=None,
+):
+    """ Yields `(rows, cols, block)`, where `block` holds the `metric`
+    distances between `x[rows]` and `y[cols]`, for the blocks of the
+    (M, N) distance matrix in row-major order.
+
+    Each block is written into the same scratch buffer, which occupies at
+    most `memory_budget` bytes, thus a block must be consumed before the
+    next one is requested. If `out` is an in-memory array, blocks are
+    instead computed directly in `out[rows, cols]`.
+
+    The distances are computed in `dtype` (by default, the common
+    floating-point type of `x` and `y`). If specified, `offset` is
+    subtracted from the rows of `x` and `y` before they are cast, which
+    leaves the distances unchanged but, for points that are far from
+    the origin, reduces the rounding errors of the matmul expansion.
+
+    `block_cols` fixes the number of columns that each block spans; by
+    default, this is determined by `memory_budget`."""
+    if dtype is None:
+        dtype = np.result_type(x.dtype, y.dtype, np.float32)
+    dtype = np.dtype(dtype)
+    num_rows, num_cols = len(x), len(y)
+    block_rows, block_cols = _block_shape(
+        num_rows,
+        num_cols if block_cols is None else block_cols,
+        _block_itemsize(dtype, metric),
+        memory_budget,
+    )
+    col_blocks = [
+        slice(c, min(c + block_cols, num_cols)) for c in range(0, num_cols, block_cols)
+    ]
+
+    # `y` - which may be a large, memory-mapped array - is only ever
+    # cast block by block
+    x = _cast(x, dtype, offset)
+    kernel = _METRICS[metric]
+    x_sq_norms = None
+    if metric in _NORM_METRICS:
+        x_sq_norms = _sq_norms(x)
+        if y_sq_norms is None:
+            y_sq_norms = _blocked_sq_norms(y, col_blocks, dtype, offset)
+
+    direct = (
+        out is not None
+        and out.dtype == dtype
+        and out.flags.c_contiguous
+        and not isinstance(out, np.memmap)
+    )
+    if not direct:
+        scratch = np.empty(block_rows * block_cols, dtype=dtype)
+
+    for r in range(0, num_rows, block_rows):
+        rows = slice(r, min(r + block_rows, num_rows))
+        for cols in col_blocks:
+            c = cols.start
+            if direct:
+                block = out[rows, cols]
+            else:
+                block = scratch[: (rows.stop - r) * (cols.stop - c)].reshape(
+                    rows.stop - r, cols.stop - c
+                )
+            kernel(
+                x[rows],
+                _cast(y[cols], dtype, offset),
+                None if x_sq_norms is None else x_sq_norms[rows],
+                None if y_sq_norms is None else y_sq_norms[cols],
+                out=block,
+            )
+            yield rows, cols, block
+
+
+def _refine_block(block, x, y, x_sq_norms, y_sq_norms, squared):
+    """ Recomputes in float-64, directly as `||x_i - y_j||`, the entries of
+    a float-32 block of (squared) Euclidean distances whose estimated
+    relative error exceeds `FLOAT32_RTOL`.
+
+    `x_sq_norms` and `y_sq_norms` are the float-32 squared norms that the
+    block was computed from; the rounding error of the matmul expansion is
+    proportional to their sum."""
+    # the relative error of a distance is half that of its square
+    scale = np.finfo(np.float32).eps / (2 * FLOAT32_RTOL)
+
+    # bounding the squared norms of `x` by their maximum yields a cheap,
+    # per-column threshold, which is then checked exactly for candidates
+    thresholds = scale * (x_sq_norms.max(initial=0) + y_sq_norms)
+    if not squared:
+        np.sqrt(thresholds, out=thresholds)
+    rows, cols = np.nonzero(block < thresholds)
+
+    sq_dists = block[rows, cols]
+    if not squared:
+        sq_dists = np.square(sq_dists)
+    (keep,) = np.nonzero(sq_dists < scale * (x_sq_norms[rows] + y_sq_norms[cols]))
+    rows, cols = rows[keep], cols[keep]
+    if len(rows):
+        diffs = _cast(x[rows], np.float64) - _cast(y[cols], np.float64)
+        refined = _sq_norms(diffs)
+        block[rows, cols] = refined if squared else np.sqrt(refined)
+
+
+def pairwise_dists(
+    x,
+    y,
+    *,
+    metric="euclidean",
+    out=None,
+    memory_budget=None,
+    n_workers=None,
+    precision=None,
+):
     """ Computing pairwise distances using memory-efficient
     vectorization.
 
+    The distance matrix is computed block by block, so that - aside
+    from the output itself - memory consumption is bounded by
+    `memory_budget`.
+
     Parameters
     ----------
     x : numpy.ndarray, shape=(M, D)
     y : numpy.ndarray, shape=(N, D)
 
+    metric : str, optional (default='euclidean')
+        One of:
+            - 'euclidean'
+            - 'sqeuclidean': the squared Euclidean distance
+            - 'cosine': one minus the cosine similarity; rows whose
+              norm is zero are treated as orthogonal to all others
+            - 'manhattan': the L1 distance
+            - 'chebyshev': the L-infinity distance
+        The first three are computed via matrix multiplication, and the
+        latter two one feature at a time.
+
+    out : Optional[numpy.ndarray], shape=(M, N)
+        If specified, the distances are written to this array (e.g.
+        a `numpy.memmap`), which is then returned.
+
+    memory_budget : Optional[int]
+        The maximum number of bytes of scratch space used to compute
+        each block of distances. Defaults to `DEFAULT_MEMORY_BUDGET`.
+
+    n_workers : Optional[int]
+        If specified, blocks of rows of `x` are processed concurrently
+        on a pool of this many threads, each of which uses its own
+        `memory_budget` bytes of scratch space. The blocks are the same
+        regardless of the number of workers, as are the results.
+
+    precision : Optional[str]
+        The floating-point type in which the distances are computed and
+        returned: 'float32' or 'float64'. Defaults to the common
+        floating-point type of `x` and `y`.
+
+        'float32' halves the scratch space and roughly doubles the
+        throughput of the matrix multiplication, but the expansion
+        ||x||^2 - 2<x, y> + ||y||^2 suffers from catastrophic
+        cancellation for nearby points. Thus any distance whose
+        estimated relative error exceeds `FLOAT32_RTOL` is recomputed in
+        float-64, directly as ||x - y||. Only supported for the
+        'euclidean' and 'sqeuclidean' metrics.
+
     Returns
     -------
     numpy.ndarray, shape=(M, N)
-        The Euclidean distance between each pair of
-        rows between `x` and `y`."""
-    dists = -2 * np.matmul(x, y.T)
-    dists += np.sum(x**2, axis=1)[:, np.newaxis]
-    dists += np.sum(y**2, axis=1)
-
-    # The original function has:
-    #
-    # `return np.sqrt(dists)`
-    #
-    # But there is a problem here. It is possible
-    # that entries in `x` and `y` are very similar.
-    # Subtracting two very similar numbers will lead to
-    # large numerical precision errors. So even though
-    # it should be mathematically impossible for `dists` to
-    # contain negative numbers, this can actually happen!
-    # Thus we actually need to clip `dists` to make sure
-    # all very-small negative numbers are set to 0.
-    return np.sqrt(np.clip(dists, a_min=0., a_max=None))
+        The distance between each pair of rows between `x` and
+        `y`."""
+    x, y = _check_pair(x, y)
+    _check_metric(metric)
+    if precision is not None and precision not in _PRECISIONS:
+        raise ValueError(
+            "`precision` must be one of {}, got {!r}".format(
+                ", ".join(_PRECISIONS), precision
+            )
+        )
+    refine = precision == "float32"
+    if refine and metric not in ("euclidean", "sqeuclidean"):
+        raise ValueError(
+            "`precision='float32'` is only supported for the 'euclidean' and "
+            "'sqeuclidean' metrics, got {!r}".format(metric)
+        )
+
+    dtype = np.result_type(x.dtype, y.dtype, np.float32)
+    if precision is not None:
+        dtype = np.dtype(precision)
+    if out is None:
+        out = np.empty((len(x), len(y)), dtype=dtype)
+    elif not isinstance(out, np.ndarray) or out.shape != (len(x), len(y)):
+        raise ValueError(
+            "`out` must be a numpy array of shape {}".format((len(x), len(y)))
+        )
+
+    # centering the points about the mean of `x` reduces the rounding
+    # errors of a float-32 computation, and thus how many entries are refined
+    offset = x.mean(axis=0, dtype=np.float64) if refine and len(x) else None
+
+    block_rows, block_cols = _block_shape(
+        len(x), len(y), _block_itemsize(dtype, metric), memory_budget
+    )
+    x_sq_norms = y_sq_norms = None
+    if metric in _NORM_METRICS:
+        # computed once, rather than by each worker
+        col_blocks = [slice(c, c + block_cols) for c in range(0, len(y), block_cols)]
+        y_sq_norms = _blocked_sq_norms(y, col_blocks, dtype, offset)
+    if refine:
+        x_sq_norms = _sq_norms(_cast(x, dtype, offset))
+
+    def fill_rows(rows):
+        rows_out = out[rows]
+        blocks = _iter_dist_blocks(
+            x[rows],
+            y,
+            memory_budget,
+            y_sq_norms,
+            out=rows_out,
+            metric=metric,
+            dtype=dtype,
+            offset=offset,
+            block_cols=block_cols,
+        )
+        for sub_rows, cols, block in blocks:
+            if refine:
+                _refine_block(
+                    block,
+                    x[rows][sub_rows],
+                    y[cols],
+                    x_sq_norms[rows][sub_rows],
+                    y_sq_norms[cols],
+                    squared=metric == "sqeuclidean",
+                )
+            if not np.may_share_memory(block, rows_out):
+                rows_out[sub_rows, cols] = block
+
+    # the rows and columns are split along the same boundaries regardless
+    # of `n_workers`, thus each entry is computed identically
+    row_blocks = [
+        slice(r, min(r + block_rows, len(x))) for r in range(0, len(x), block_rows)
+    ]
+    run_threaded(fill_rows, row_blocks, n_workers)
+    return out
+
+
+_REDUCTIONS = ("min", "argmin", "max", "argmax", "sum")
+
+
+def _reduce_from_blocks(blocks, shape, op, axis, dtype):
+    """ Reduces the blocks yielded by `_iter_dist_blocks` along `axis`,
+    keeping only a running reduction for each row (axis=1) or column
+    (axis=0) of the distance matrix."""
+    size = shape[1 - axis]
+    if op == "sum":
+        out = np.zeros(size, dtype=dtype)
+    else:
+        best = np.full(size, np.inf if op.endswith("min") else -np.inf, dtype=dtype)
+        best_indices = np.zeros(size, dtype=np.intp)
+    arg_reduce = np.argmin if op.endswith("min") else np.argmax
+
+    for rows, cols, block in blocks:
+        kept, offset = (rows, cols.start) if axis == 1 else (cols, rows.start)
+        if op == "sum":
+            out[kept] += block.sum(axis=axis)
+            continue
+
+        picks = arg_reduce(block, axis=axis)
+        other = np.arange(len(picks))
+        values = block[other, picks] if axis == 1 else block[picks, other]
+        # strict comparisons retain the first of tied entries, as blocks
+        # arrive in order along `axis`
+        if op.endswith("min"):
+            better = values < best[kept]
+        else:
+            better = values > best[kept]
+        best[kept] = np.where(better, values, best[kept])
+        best_indices[kept] = np.where(better, picks + offset, best_indices[kept])
+
+    if op == "sum":
+        return out
+    return best_indices if op.startswith("arg") else best
+
+
+def pairwise_reduce(x, y, op, *, axis=1, metric="euclidean", memory_budget=None):
+    """ Reduces the distance matrix between `x` and `y` along one of its
+    axes, without materializing it.
+
+    The distances are computed block by block, as in `pairwise_dists`,
+    and only a running reduction is retained; e.g. assigning each of M
+    points to its nearest of N centroids requires O(M) memory rather
+    than O(M * N).
+
+    Parameters
+    ----------
+    x : numpy.ndarray, shape=(M, D)
+    y : numpy.ndarray, shape=(N, D)
+
+    op : str
+        One of: 'min', 'argmin', 'max', 'argmax', 'sum'. Ties are
+        resolved in favor of the smallest index, as in `numpy.argmin`.
+
+    axis : int, optional (default=1)
+        The axis of the shape-(M, N) distance matrix to reduce: 1 to
+        reduce over `y` for each row of `x`, 0 to reduce over `x` for
+        each row of `y`.
+
+    metric : str, optional (default='euclidean')
+        The distance metric; see `pairwise_dists`.
+
+    memory_budget : Optional[int]
+        The maximum number of bytes of scratch space used to compute
+        each block of distances. Defaults to `DEFAULT_MEMORY_BUDGET`.
+
+    Returns
+    -------
+    numpy.ndarray, shape=(M,) or shape=(N,)
+        Equivalent to `getattr(pairwise_dists(x, y), op)(axis=axis)`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> x = np.array([[0., 0.], [5., 5.]])
+    >>> centroids = np.array([[4., 4.], [1., 0.]])
+    >>> pairwise_reduce(x, centroids, "argmin")
+    array([1, 0])"""
+    x, y = _check_pair(x, y)
+    _check_metric(metric)
+    if op not in _REDUCTIONS:
+        raise ValueError(
+            "`op` must be one of {}, got {!r}".format(", ".join(_REDUCTIONS), op)
+        )
+    if axis not in (0, 1, -1, -2):
+        raise ValueError("`axis` must be 0 or 1, got {}".format(axis))
+    axis %= 2
+
+    shape = (len(x), len(y))
+    if op != "sum" and shape[axis] == 0:
+        raise ValueError("cannot compute '{}' along an axis of length zero".format(op))
+    dtype = np.result_type(x.dtype, y.dtype, np.float32)
+    blocks = _iter_dist_blocks(x, y, memory_budget, metric=metric)
+    return _reduce_from_blocks(blocks, shape, op, axis, dtype)
+
+
+def _smallest_k(dists, indices, k):
+    """ Returns the `k` smallest distances in each row of `dists`, along
+    with their corresponding entries of `indices`, in no particular order."""
+    if dists.shape[1] <= k:
+        return dists, indices
+    part = np.argpartition(dists, k - 1, axis=1)[:, :k]
+    return (
+        np.take_along_axis(dists, part, axis=1),
+        np.take_along_axis(indices, part, axis=1),
+    )
+
+
+def _knn_from_blocks(blocks, num_rows, num_cols, k, dtype):
+    """ Reduces the row-major blocks yielded by `_iter_dist_blocks` to the
+    sorted k-nearest neighbors of each row, keeping only a running top-k
+    for the rows of the current block."""
+    dists = np.empty((num_rows, k), dtype=dtype)
+    indices = np.empty((num_rows, k), dtype=np.intp)
+
+    for rows, cols, block in blocks:
+        block_indices = np.broadcast_to(np.arange(cols.start, cols.stop), block.shape)
+        cand_dists, cand_indices = _smallest_k(block, block_indices, k)
+        if cand_dists is block:
+            # `block` is a reused scratch buffer
+            cand_dists = block.copy()
+        if cols.start > 0:
+            cand_dists, cand_indices = _smallest_k(
+                np.concatenate([best_dists, cand_dists], axis=1),
+                np.concatenate([best_indices, cand_indices], axis=1),
+                k,
+            )
+        best_dists, best_indices = cand_dists, cand_indices
+
+        if cols.stop == num_cols:
+            order = np.argsort(best_dists, axis=1, kind="stable")
+            dists[rows] = np.take_along_axis(best_dists, order, axis=1)
+            indices[rows] = np.take_along_axis(best_indices, order, axis=1)
+    return dists, indices
+
+
+def _check_k(k, num_cols):
+    if not 1 <= k <= num_cols:
+        raise ValueError(
+            "`k` must be an integer in [1, {}], got {}".format(num_cols, k)
+        )
+
+
+def knn(x, y, k, *, metric="euclidean", memory_budget=None):
+    """ Finds the `k` nearest neighbors in `y` of each row of `x`.
+
+    The distances are computed block by block, as in `pairwise_dists`,
+    and only a running top-k is retained for each row; the full (M, N)
+    distance matrix is never held in memory.
+
+    Parameters
+    ----------
+    x : numpy.ndarray, shape=(M, D)
+    y : numpy.ndarray, shape=(N, D)
+
+    k : int
+        The number of neighbors to find, 1 <= k <= N.
+
+    metric : str, optional (default='euclidean')
+        The distance metric; see `pairwise_dists`.
+
+    memory_budget : Optional[int]
+        The maximum number of bytes of scratch space used to compute
+        each block of distances. Defaults to `DEFAULT_MEMORY_BUDGET`.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray], shape=(M, k)
+        The distances to - and the indices into `y` of - the
+        nearest neighbors of each row of `x`, in order of increasing
+        distance.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> x = np.array([[0., 0.]])
+    >>> y = np.array([[3., 0.], [1., 0.], [0., 2.]])
+    >>> knn(x, y, k=2)
+    (array([[1., 2.]]), array([[1, 2]]))"""
+    x, y = _check_pair(x, y)
+    _check_k(k, len(y))
+    _check_metric(metric)
+    dtype = np.result_type(x.dtype, y.dtype, np.float32)
+    blocks = _iter_dist_blocks(x, y, memory_budget, metric=metric)
+    return _knn_from_blocks(blocks, len(x), len(y), k, dtype)
+
+
+def _iter_block_pairs(blocks, max_dist):
+    """ Yields, for each block yielded by `_iter_dist_blocks`, the
+    (rows, cols, dists) of its entries that are within `max_dist`."""
+    for rows, cols, block in blocks:
+        r, c = np.nonzero(block <= max_dist)
+        yield r + rows.start, c + cols.start, block[r, c]
+
+
+def _pairs_from_blocks(blocks, max_dist, dtype):
+    """ Collects, in COO form, the entries of the blocks yielded by
+    `_iter_dist_blocks` that are within `max_dist`, in row-major order."""
+    hit_rows, hit_cols, hit_dists = [np.empty(0, dtype=np.intp)], [], []
+    for r, c, d in _iter_block_pairs(blocks, max_dist):
+        hit_rows.append(r)
+        hit_cols.append(c)
+        hit_dists.append(d)
+
+    hit_rows = np.concatenate(hit_rows)
+    # blocks arrive in row-major order, thus a stable sort on the rows
+    # leaves the columns of each row in increasing order
+    order = np.argsort(hit_rows, kind="stable")
+    return (
+        hit_rows[order],
+        np.concatenate([np.empty(0, dtype=np.intp)] + hit_cols)[order],
+        np.concatenate([np.empty(0, dtype=dtype)] + hit_dists)[order],
+    )
+
+
+def _radius_from_blocks(blocks, num_rows, radius, dtype):
+    """ Collects, in CSR form, the entries of the blocks yielded by
+    `_iter_dist_blocks` that are within `radius`."""
+    return csr_from_pairs(*_pairs_from_blocks(blocks, radius, dtype), num_rows)
+
+
+def iter_pairs_within(x, y, max_dist, *, metric="euclidean", memory_budget=None):
+    """ Lazily finds the pairs of rows between `x` and `y` that are
+    within `max_dist` of one another, one block of the distance matrix
+    at a time.
+
+    Memory consumption is bounded by `memory_budget` plus the number
+    of qualifying pairs in a block.
+
+    Parameters
+    ----------
+    x : numpy.ndarray, shape=(M, D)
+    y : numpy.ndarray, shape=(N, D)
+    max_dist : float
+
+    metric : str, optional (default='euclidean')
+        The distance metric; see `pairwise_dists`.
+
+    memory_budget : Optional[int]
+        The maximum number of bytes of scratch space used to compute
+        each block of distances. Defaults to `DEFAULT_MEMORY_BUDGET`.
+
+    Yields
+    ------
+    Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        The rows of `x`, the rows of `y`, and the distances of the
+        qualifying pairs in the next block of the distance matrix."""
+    x, y = _check_pair(x, y)
+    _check_metric(metric)
+    blocks = _iter_dist_blocks(x, y, memory_budget, metric=metric)
+    yield from _iter_block_pairs(blocks, max_dist)
+
+
+def pairs_within(x, y, max_dist, *, metric="euclidean", memory_budget=None):
+    """ Finds the pairs of rows between `x` and `y` that are within
+    `max_dist` of one another, without materializing the full distance
+    matrix.
+
+    Parameters
+    ----------
+    x : numpy.ndarray, shape=(M, D)
+    y : numpy.ndarray, shape=(N, D)
+    max_dist : float
+
+    metric : str, optional (default='euclidean')
+        The distance metric; see `pairwise_dists`.
+
+    memory_budget : Optional[int]
+        The maximum number of bytes of scratch space used to compute
+        each block of distances. Defaults to `DEFAULT_MEMORY_BUDGET`.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        The qualifying pairs in COO form: `(i, j, dists)`, such that
+        `dists[n]` is the distance between `x[i[n]]` and `y[j[n]]`,
+        sorted by `i` and then by `j`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> x = np.array([[0., 0.], [5., 5.]])
+    >>> y = np.array([[3., 0.], [1., 0.], [0., 2.]])
+    >>> pairs_within(x, y, max_dist=2.)
+    (array([0, 0]), array([1, 2]), array([1., 2.]))"""
+    x, y = _check_pair(x, y)
+    _check_metric(metric)
+    dtype = np.result_type(x.dtype, y.dtype, np.float32)
+    blocks = _iter_dist_blocks(x, y, memory_budget, metric=metric)
+    return _pairs_from_blocks(blocks, max_dist, dtype)
+
+
+def condensed_index(i, j, n):
+    """ Returns the position of the distance between rows `i` and `j`
+    of an n-row array in its condensed distance vector (see `pdist`).
+
+    Parameters
+    ----------
+    i : Union[int, numpy.ndarray]
+    j : Union[int, numpy.ndarray]
+        Row indices, with `i != j`; the order of `i` and `j` does not
+        matter.
+
+    n : int
+        The number of rows.
+
+    Returns
+    -------
+    Union[int, numpy.ndarray]
+
+    Examples
+    --------
+    >>> condensed_index(0, 1, n=4), condensed_index(3, 2, n=4)
+    (0, 5)"""
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    if np.any(i == j) or np.any(i < 0) or np.any(j >= n):
+        raise ValueError(
+            "`i` and `j` must be distinct row indices in [0, {})".format(n)
+        )
+    out = n * i - i * (i + 1) // 2 + (j - i - 1)
+    return int(out) if np.ndim(out) == 0 else out
+
+
+def _condensed_size(n):
+    return n * (n - 1) // 2
+
+
+def pdist(x, *, metric="euclidean", out=None, memory_budget=None):
+    """ Computes the distances between each pair of distinct rows of
+    `x`, which are returned in condensed form.
+
+    Only the upper triangle of the (symmetric) distance matrix is
+    computed, block by block, thus this requires half of the compute
+    and memory of `pairwise_dists(x, x)`.
+
+    Parameters
+    ----------
+    x : numpy.ndarray, shape=(N, D)
+
+    metric : str, optional (default='euclidean')
+        The distance metric; see `pairwise_dists`.
+
+    out : Optional[numpy.ndarray], shape=(N * (N - 1) // 2,)
+        If specified, the distances are written to this array (e.g.
+        a `numpy.memmap`), which is then returned.
+
+    memory_budget : Optional[int]
+        The maximum number of bytes of scratch space used to compute
+        each block of distances. Defaults to `DEFAULT_MEMORY_BUDGET`.
+
+    Returns
+    -------
+    numpy.ndarray, shape=(N * (N - 1) // 2,)
+        The distance between rows `i < j` is stored at
+        `condensed_index(i, j, N)`; i.e. the rows of the upper triangle
+        of the distance matrix are laid out end to end, as in
+        `scipy.spatial.distance.pdist`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> pdist(np.array([[0., 0.], [3., 0.], [0., 4.]]))
+    array([3., 4., 5.])"""
+    x, _ = _check_pair(x, x)
+    _check_metric(metric)
+    n = len(x)
+    dtype = np.result_type(x.dtype, np.float32)
+    size = _condensed_size(n)
+    if out is None:
+        out = np.empty(size, dtype=dtype)
+    elif not isinstance(out, np.ndarray) or out.shape != (size,):
+        raise ValueError("`out` must be a numpy array of shape {}".format((size,)))
+
+    sq_norms = None
+    if metric in _NORM_METRICS:
+        sq_norms = _sq_norms(x.astype(dtype, copy=False))
+    itemsize = _block_itemsize(dtype, metric)
+    r = 0
+    while r < n - 1:
+        # only the columns on or above the diagonal are computed; as the
+        # triangle narrows, more of its rows fit in the memory budget
+        block_rows, _ = _block_shape(n - 1 - r, n - r, itemsize, memory_budget)
+        rows = slice(r, r + block_rows)
+        blocks = _iter_dist_blocks(
+            x[rows],
+            x[r:],
+            memory_budget,
+            None if sq_norms is None else sq_norms[r:],
+            metric=metric,
+        )
+        for sub_rows, cols, block in blocks:
+            if cols.start == 0 and cols.stop == n - r:
+                # the block spans entire rows, whose entries above the
+                # diagonal are contiguous in the condensed layout
+                first = r + sub_rows.start
+                start = condensed_index(first, first + 1, n)
+                for i, row in enumerate(block, first):
+                    out[start : start + n - i - 1] = row[i - r + 1 :]
+                    start += n - i - 1
+            else:
+                i = np.arange(r + sub_rows.start, r + sub_rows.stop)[:, np.newaxis]
+                j = np.arange(r + cols.start, r + cols.stop)
+                ii, jj = np.nonzero(j > i)
+                out[condensed_index(i[ii, 0], j[jj], n)] = block[ii, jj]
+        r = rows.stop
+    return out
+
+
+def squareform(condensed):
+    """ Expands a condensed distance vector (see `pdist`) into the full,
+    symmetric distance matrix, whose diagonal is exactly zero.
+
+    Parameters
+    ----------
+    condensed : numpy.ndarray, shape=(N * (N - 1) // 2,)
+
+    Returns
+    -------
+    numpy.ndarray, shape=(N, N)
+        As in `scipy.spatial.distance.squareform`, an empty vector is
+        expanded to a shape-(1, 1) matrix.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> squareform(np.array([3., 4., 5.]))
+    array([[0., 3., 4.],
+           [3., 0., 5.],
+           [4., 5., 0.]])"""
+    condensed = np.asarray(condensed)
+    n = int(round((1 + np.sqrt(1 + 8 * len(condensed))) / 2))
+    if condensed.ndim != 1 or _condensed_size(n) != len(condensed):
+        raise ValueError(
+            "`condensed` must be a shape-(N * (N - 1) // 2,) array, "
+            "got shape {}".format(condensed.shape)
+        )
+    out = np.zeros((n, n), dtype=condensed.dtype)
+    start = 0
+    for i in range(n - 1):
+        row = condensed[start : start + n - i - 1]
+        out[i, i + 1 :] = row
+        out[i + 1 :, i] = row
+        start += n - i - 1
+    return out
+
+
+class ReferenceIndex:
+    """ A fixed reference set of points, `y`, against which batches of
+    query points can repeatedly be compared.
+
+    The squared norms of the rows of `y` are computed once, upon
+    construction, rather than upon every query.
+
+    Parameters
+    ----------
+    y : numpy.ndarray, shape=(N, D)
+        The reference points. This may be a (memory-mapped) array that
+        is too large to fit in memory.
+
+    dtype : Optional[numpy.dtype]
+        The floating-point type in which the reference points are stored
+        and in which queries are computed, e.g. float-32 to halve memory
+        consumption. Defaults to the data type of `y` (or float-64 for
+        non-floating types). Note that `y` is read into memory if it
+        must be converted to this type.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> index = ReferenceIndex(np.array([[3., 0.], [1., 0.], [0., 2.]]))
+    >>> index.knn(np.array([[0., 0.]]), k=1)
+    (array([[1.]]), array([[1]]))"""
+
+    def __init__(self, y, *, dtype=None):
+        y = np.asarray(y)
+        if dtype is None:
+            dtype = y.dtype if np.issubdtype(y.dtype, np.floating) else np.float64
+        dtype = np.dtype(dtype)
+        if not np.issubdtype(dtype, np.floating):
+            raise ValueError(
+                "`dtype` must be a floating-point data type, got {}".format(dtype)
+            )
+        if y.ndim != 2:
+            raise ValueError(
+                "`y` must be a shape-(N, D) array, got shape {}".format(y.shape)
+            )
+        if y.dtype != dtype:
+            y = y.astype(dtype)
+
+        block_rows = max(
+            1, DEFAULT_MEMORY_BUDGET // (dtype.itemsize * max(1, y.shape[1]))
+        )
+        self.y = y
+        self.y_sq_norms = _blocked_sq_norms(
+            y,
+            [slice(r, r + block_rows) for r in range(0, len(y), block_rows)],
+            dtype,
+        )
+
+    def __len__(self):
+        return len(self.y)
+
+    @property
+    def dtype(self):
+        """ The data type in which the reference points are stored."""
+        return self.y.dtype
+
+    def _blocks(self, x, memory_budget, out=None):
+        x, y = _check_pair(x, self.y)
+        x = x.astype(self.dtype, copy=False)
+        return x, _iter_dist_blocks(x, y, memory_budget, self.y_sq_norms, out=out)
+
+    def dists(self, x, *, out=None, memory_budget=None):
+        """ Computes the distances between each query point and each
+        reference point; see `pairwise_dists`.
+
+        Parameters
+        ----------
+        x : numpy.ndarray, shape=(M, D)
+        out : Optional[numpy.ndarray], shape=(M, N)
+        memory_budget : Optional[int]
+
+        Returns
+        -------
+        numpy.ndarray, shape=(M, N)"""
+        shape = (len(x), len(self))
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+        elif not isinstance(out, np.ndarray) or out.shape != shape:
+            raise ValueError("`out` must be a numpy array of shape {}".format(shape))
+
+        _, blocks = self._blocks(x, memory_budget, out=out)
+        for rows, cols, block in blocks:
+            if not np.may_share_memory(block, out):
+                out[rows, cols] = block
+        return out
+
+    def knn(self, x, k, *, memory_budget=None):
+        """ Finds the `k` nearest reference points of each query point;
+        see `knn`.
+
+        Parameters
+        ----------
+        x : numpy.ndarray, shape=(M, D)
+        k : int
+        memory_budget : Optional[int]
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray], shape=(M, k)
+            The distances to, and the indices of, the nearest neighbors."""
+        _check_k(k, len(self))
+        x, blocks = self._blocks(x, memory_budget)
+        return _knn_from_blocks(blocks, len(x), len(self), k, self.dtype)
+
+    def query_radius(self, x, radius, *, memory_budget=None):
+        """ Finds, for each query point, all of the reference points that
+        lie within `radius` of it.
+
+        Parameters
+        ----------
+        x : numpy.ndarray, shape=(M, D)
+        radius : float
+        memory_budget : Optional[int]
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+            The neighbors in CSR form: `indptr` (shape-(M + 1,)),
+            `indices` and `dists`, where the neighbors of query point
+            `i` are `indices[indptr[i]:indptr[i + 1]]`, in increasing
+            order, at distances `dists[indptr[i]:indptr[i + 1]]`."""
+        x, blocks = self._blocks(x, memory_budget)
+        return _radius_from_blocks(blocks, len(x), radius, self.dtype)
+
+    def save(self, directory):
+        """ Saves the reference points and their squared norms as .npy
+        files in `directory`, which is created if necessary."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "y.npy"), self.y)
+        np.save(os.path.join(directory, "y_sq_norms.npy"), self.y_sq_norms)
+
+    @classmethod
+    def load(cls, directory, *, mmap=True):
+        """ Loads an index that was saved via `ReferenceIndex.save`.
+
+        Parameters
+        ----------
+        directory : PathLike
+        mmap : bool, optional (default=True)
+            If `True`, the reference points are memory-mapped (read-only)
+            rather than read into memory.
+
+        Returns
+        -------
+        ReferenceIndex"""
+        mmap_mode = "r" if mmap else None
+        out = cls.__new__(cls)
+        out.y = np.load(os.path.join(directory, "y.npy"), mmap_mode=mmap_mode)
+        out.y_sq_norms = np.load(os.path.join(directory, "y_sq_norms.npy"))
+        return out
+
+    def __repr__(self):
+        return "{}(num_points={}, dim={}, dtype={})".format(
+            type(self).__name__, len(self), self.y.shape[1], self.dtype
+        )
+
+
+class LSHIndex:
+    """ An approximate nearest-neighbor index over a fixed reference set,
+    `y`, based on random-hyperplane locality-sensitive hashing.
+
+    Each of `n_tables` hash tables assigns every point to a bucket
+    according to which side of each of `n_bits` random hyperplanes
+    (through the mean of `y`) it lies on. The candidate neighbors of a
+    query point are the reference points that share a bucket with it in
+    any table; only these are ranked by their exact distances.
+
+    More tables raise the recall, at the cost of more candidates per
+    query; more bits per hash shrink the buckets, which lowers both the
+    recall and the number of candidates.
+
+    Parameters
+    ----------
+    y : numpy.ndarray, shape=(N, D)
+        The reference points. These are hashed once, upon construction.
+
+    n_tables : int, optional (default=8)
+        The number of hash tables.
+
+    n_bits : int, optional (default=12)
+        The number of hyperplanes, 1 <= n_bits <= 62, per hash table.
+
+    seed : Optional[int]
+        Seeds the random hyperplanes.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> y = np.random.RandomState(0).rand(1000, 8)
+    >>> index = LSHIndex(y, n_tables=16, n_bits=6, seed=0)
+    >>> dists, indices = index.query(y[:5], k=3)
+    >>> indices[:, 0]
+    array([0, 1, 2, 3, 4])"""
+
+    def __init__(self, y, *, n_tables=8, n_bits=12, seed=None):
+        y = np.asarray(y)
+        if y.ndim != 2:
+            raise ValueError(
+                "`y` must be a shape-(N, D) array, got shape {}".format(y.shape)
+            )
+        if not 1 <= n_tables:
+            raise ValueError("`n_tables` must be positive, got {}".format(n_tables))
+        if not 1 <= n_bits <= 62:
+            raise ValueError(
+                "`n_bits` must be an integer in [1, 62], got {}".format(n_bits)
+            )
+        self.y = y
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+
+        rng = np.random.RandomState(seed)
+        self._center = (
+            y.mean(axis=0, dtype=np.float64) if len(y) else np.zeros(y.shape[1])
+        )
+        self._planes = rng.standard_normal((y.shape[1], n_tables * n_bits))
+
+        codes = self._hash(y)
+        # each table's points are sorted by their codes, so that the
+        # members of a bucket are contiguous
+        self._order = np.argsort(codes, axis=1, kind="stable")
+        self._codes = np.take_along_axis(codes, self._order, axis=1)
+
+    def __len__(self):
+        return len(self.y)
+
+    def _hash(self, points):
+        """ Returns the shape-(n_tables, len(points)) bucket codes of
+        `points`, projecting one block of rows at a time."""
+        codes = np.empty((self.n_tables, len(points)), dtype=np.int64)
+        weights = np.left_shift(1, np.arange(self.n_bits, dtype=np.int64))
+        block_rows = max(1, DEFAULT_MEMORY_BUDGET // (8 * self._planes.shape[1]))
+        for r in range(0, len(points), block_rows):
+            rows = slice(r, r + block_rows)
+            projections = _cast(points[rows], np.float64, self._center) @ self._planes
+            bits = (projections > 0).reshape(-1, self.n_tables, self.n_bits)
+            codes[:, rows] = (bits @ weights).T
+        return codes
+
+    def _rank_candidates(self, x, chunk, starts, counts, k):
+        """ Ranks the candidates of the queries `x[chunk]` - the members
+        of the buckets `self._order[t][starts[t]:starts[t] + counts[t]]` of
+        each table `t` - by their exact distances. Returns the queries
+        with at least `k` candidates, and their k-nearest candidates."""
+        num_points = len(self)
+        queries = np.arange(chunk.start, chunk.stop)
+        pairs = []
+        for t in range(self.n_tables):
+            # expand each bucket into the positions of its members
+            positions = bucket_positions(starts[t], counts[t])
+            pairs.append(
+                np.repeat(queries, counts[t]) * num_points + self._order[t][positions]
+            )
+        # a candidate may share a bucket with a query in several tables
+        rows, cols = np.divmod(np.unique(np.concatenate(pairs)), num_points)
+
+        dtype = np.result_type(x.dtype, self.y.dtype, np.float32)
+        dists = np.sqrt(_sq_norms(_cast(x[rows], dtype) - _cast(self.y[cols], dtype)))
+        order = np.lexsort((cols, dists, rows))
+
+        num_candidates = np.bincount(rows - chunk.start, minlength=len(queries))
+        (done,) = np.nonzero(num_candidates >= k)
+        first = np.cumsum(num_candidates) - num_candidates
+        nearest = order[first[done][:, np.newaxis] + np.arange(k)]
+        return queries[done], dists[nearest], cols[nearest]
+
+    def query(self, x, k, *, memory_budget=None):
+        """ Finds the approximate `k` nearest reference points of each
+        query point.
+
+        Queries that share buckets with fewer than `k` reference points
+        are answered by an exact search (see `knn`).
+
+        Parameters
+        ----------
+        x : numpy.ndarray, shape=(M, D)
+
+        k : int
+            The number of neighbors to find, 1 <= k <= N.
+
+        memory_budget : Optional[int]
+            The approximate maximum number of bytes occupied by the
+            candidates that are ranked at once. Defaults to
+            `DEFAULT_MEMORY_BUDGET`.
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray], shape=(M, k)
+            The Euclidean distances to - and the indices into `y` of -
+            the approximate nearest neighbors of each query point, in
+            order of increasing distance."""
+        x, y = _check_pair(x, self.y)
+        _check_k(k, len(self))
+
+        codes = self._hash(x)
+        starts = np.stack(
+            [np.searchsorted(self._codes[t], codes[t]) for t in range(self.n_tables)]
+        )
+        counts = np.stack(
+            [
+                np.searchsorted(self._codes[t], codes[t], side="right")
+                for t in range(self.n_tables)
+            ]
+        )
+        counts -= starts
+
+        dtype = np.result_type(x.dtype, y.dtype, np.float32)
+        dists = np.empty((len(x), k), dtype=dtype)
+        indices = np.empty((len(x), k), dtype=np.intp)
+        found = np.zeros(len(x), dtype=bool)
+
+        # the queries are ranked in chunks of bounded numbers of candidates,
+        # each of which occupies about one row of `x` and of `y`
+        total = np.cumsum(counts.sum(axis=0))
+        _, max_pairs = _block_shape(
+            1,
+            max(1, total[-1] if len(x) else 0),
+            8 * (2 * x.shape[1] + 1),
+            memory_budget,
+        )
+        start = 0
+        while start < len(x):
+            done_before = total[start - 1] if start else 0
+            stop = max(
+                start + 1,
+                int(np.searchsorted(total, done_before + max_pairs, side="right")),
+            )
+            chunk = slice(start, stop)
+            queries, chunk_dists, chunk_indices = self._rank_candidates(
+                x, chunk, starts[:, chunk], counts[:, chunk], k
+            )
+            dists[queries] = chunk_dists
+            indices[queries] = chunk_indices
+            found[queries] = True
+            start = stop
+
+        (missing,) = np.nonzero(~found)
+        if len(missing):
+            dists[missing], indices[missing] = knn(
+                x[missing], y, k, memory_budget=memory_budget
+            )
+        return dists, indices
+
+    def recall(self, x, k, *, memory_budget=None):
+        """ Measures the recall of `LSHIndex.query` for a batch of query
+        points: the fraction of their exact `k` nearest neighbors that
+        are found.
+
+        Parameters
+        ----------
+        x : numpy.ndarray, shape=(M, D)
+        k : int
+        memory_budget : Optional[int]
+
+        Returns
+        -------
+        float"""
+        x, y = _check_pair(x, self.y)
+        _, approx = self.query(x, k, memory_budget=memory_budget)
+        _, exact = knn(x, y, k, memory_budget=memory_budget)
+        rows = np.arange(len(x))[:, np.newaxis] * len(self)
+        hits = np.intersect1d(rows + approx, rows + exact, assume_unique=True)
+        return len(hits) / exact.size if exact.size else 1.0
+
+    def __repr__(self):
+        return "{}(num_points={}, dim={}, n_tables={}, n_bits={})".format(
+            type(self).__name__, len(self), self.y.shape[1], self.n_tables, self.n_bits
+        )
@@ -0,0 +1,140 @@
+"""
+Contains `PointSet`, a container of (x, y) coordinates whose transforms are
+accumulated lazily and applied in a single pass.
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+from numpy import ndarray
+
+from plymi_mod6._points import check_points, resolve_dtype
+from plymi_mod6.homography import Homography
+from plymi_mod6.transforms import Transform
+
+__all__ = ["PointSet"]
+
+
+class PointSet:
+    """ A contiguous, shape-(N, 2) array of (x, y) coordinates that carries a
+    pending transform.
+
+    Calling `translate`, `rotate`, `shear`, `scale`, or `then` only updates the
+    pending 3x3 transform matrix; the coordinates are left untouched. The pending
+    transform is applied - in place, in a single pass over the coordinates - the
+    next time they are accessed via `PointSet.points`.
+
+    Parameters
+    ----------
+    points : array_like, shape=(N, 2)
+        Length-N array of (x, y) coordinates
+
+    dtype : Optional[numpy.dtype]
+        The floating-point data type in which the coordinates are stored, e.g.
+        float-32 to halve the memory footprint. Defaults to float-64.
+
+    copy : bool, optional (default=True)
+        If `False`, and `points` is already a C-contiguous array of the
+        appropriate data type, then it is used as the storage for the point set
+        (and it will be modified in place when the point set is materialized).
+
+    Examples
+    --------
+    >>> point_set = PointSet([[1., 0.], [0., 1.]])
+    >>> point_set.rotate(90.).translate(x_shift=1., y_shift=0.)
+    PointSet(num_points=2, dtype=float64, pending=True)
+    >>> point_set.points
+    array([[1., 1.],
+           [0., 0.]])
+    """
+
+    __slots__ = ("_points", "_pending")
+
+    def __init__(
+        self, points: ndarray, *, dtype: Optional[np.dtype] = None, copy: bool = True
+    ):
+        points = check_points(points, resolve_dtype(dtype, None))
+        if copy or not points.flags.c_contiguous or not points.flags.writeable:
+            points = np.array(points, order="C")
+        self._points = points
+        self._pending = None  # type: Optional[Transform]
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """ The data type of the stored coordinates."""
+        return self._points.dtype
+
+    @property
+    def pending(self) -> Transform:
+        """ The transform that has yet to be applied to the stored coordinates."""
+        return Transform() if self._pending is None else self._pending
+
+    @property
+    def points(self) -> ndarray:
+        """ The shape-(N, 2) array of (x, y) coordinates, with all pending
+        transforms applied."""
+        if self._pending is not None:
+            self._pending.apply(self._points, out=self._points)
+            self._pending = None
+        return self._points
+
+    def then(self, transform: Union[Transform, Homography, ndarray]) -> "PointSet":
+        """ Appends a transform to the pending transform.
+
+        Parameters
+        ----------
+        transform : Union[Transform, Homography, array_like]
+            A transform, a homography, or a shape-(3, 3) matrix.
+
+        Returns
+        -------
+        PointSet
+            This point set, so that calls can be chained.
+        """
+        self._pending = self.pending.then(transform)
+        return self
+
+    def translate(self, *, x_shift: float, y_shift: float) -> "PointSet":
+        """ Lazily translates the points; see `transforms.translate`."""
+        self._pending = self.pending.translate(x_shift=x_shift, y_shift=y_shift)
+        return self
+
+    def rotate(self, deg_rot: float) -> "PointSet":
+        """ Lazily rotates the points; see `transforms.rotate`."""
+        self._pending = self.pending.rotate(deg_rot)
+        return self
+
+    def shear(self, *, x_shear: float, y_shear: float) -> "PointSet":
+        """ Lazily shears the points; see `transforms.shear`."""
+        self._pending = self.pending.shear(x_shear=x_shear, y_shear=y_shear)
+        return self
+
+    def scale(self, *, x_scale: float, y_scale: float) -> "PointSet":
+        """ Lazily scales the points; see `transforms.scale`."""
+        self._pending = self.pending.scale(x_scale=x_scale, y_scale=y_scale)
+        return self
+
+    def copy(self) -> "PointSet":
+        """ Returns a copy of the point set, including its pending transform.
+
+        Returns
+        -------
+        PointSet
+        """
+        out = type(self)(self._points, dtype=self.dtype)
+        out._pending = self._pending
+        return out
+
+    def __array__(self, dtype: Optional[np.dtype] = None, copy: Optional[bool] = None):
+        points = self.points
+        if copy:
+            return np.array(points, dtype=dtype)
+        return points if dtype is None else points.astype(dtype, copy=False)
+
+    def __repr__(self) -> str:
+        return "{}(num_points={}, dtype={}, pending={})".format(
+            type(self).__name__, len(self), self.dtype, self._pending is not None
+        )
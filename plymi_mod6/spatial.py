@@ -0,0 +1,326 @@
+"""
+Contains `GridIndex`, a spatial index for radius and k-nearest-neighbor queries on
+low-dimensional points, e.g. the shape-(N, 2) coordinates produced by
+`plymi_mod6.transforms` and `plymi_mod6.homography`.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from plymi_mod6._sparse import bucket_positions, csr_from_pairs
+from plymi_mod6.numpy_functions import ReferenceIndex, knn
+
+__all__ = ["GridIndex"]
+
+# Points of a higher dimensionality are queried by brute force, as the number of
+# neighboring grid cells grows exponentially with dimension
+MAX_GRID_DIM = 3
+
+# The number of points per grid cell that the default cell size aims for
+_POINTS_PER_CELL = 2
+
+# The maximum number of (query, neighboring cell) pairs that are examined at once
+_QUERY_BUDGET = 2 ** 20
+
+# The maximum number of (query, indexed point) candidate pairs whose distances are
+# computed at once; a single query may exceed this, as it has at most N candidates
+_CANDIDATE_BUDGET = 2 ** 20
+
+# Queries whose candidates amount to more than this fraction of the indexed points -
+# e.g. due to clustered points - are answered by brute force instead
+_BRUTE_FORCE_FRACTION = 0.1
+
+
+class GridIndex:
+    """ A spatial index that hashes points into a uniform grid of cells, so that
+    a radius query need only examine the points in the cells that neighbor the
+    query point, rather than all N points.
+
+    Points with more than `MAX_GRID_DIM` dimensions are not gridded; they are
+    instead queried by brute force via `plymi_mod6.numpy_functions.ReferenceIndex`.
+
+    Parameters
+    ----------
+    points : array_like, shape=(N, D)
+        The points to be indexed.
+
+    cell_size : Optional[float]
+        The side-length of the grid cells. Queries are fastest when this is
+        comparable to the typical query radius. By default, it is chosen such that
+        each cell contains a couple of points, on average.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> index = GridIndex(np.array([[0., 0.], [1., 0.], [5., 5.]]), cell_size=1.)
+    >>> indptr, indices, dists = index.query_radius(np.array([[0.2, 0.]]), radius=1.)
+    >>> indices[indptr[0]:indptr[1]]
+    array([0, 1])
+    """
+
+    def __init__(self, points: ndarray, *, cell_size: Optional[float] = None):
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2:
+            raise ValueError(
+                "`points` must be a shape-(N, D) array, got shape {}".format(
+                    points.shape
+                )
+            )
+        self.points = points
+        self.cell_size = None  # type: Optional[float]
+        self._reference = None  # type: Optional[ReferenceIndex]
+
+        num_points, dim = points.shape
+        if dim > MAX_GRID_DIM or num_points == 0:
+            return
+
+        lower = points.min(axis=0)
+        if cell_size is None:
+            extent = points.max(axis=0) - lower
+            extent = extent[extent > 0]
+            cell_size = (
+                (np.prod(extent) * _POINTS_PER_CELL / num_points) ** (1 / len(extent))
+                if len(extent)
+                else 1.0
+            )
+        if not cell_size > 0:
+            raise ValueError("`cell_size` must be positive, got {}".format(cell_size))
+
+        cells = np.floor((points - lower) / cell_size).astype(np.int64)
+        grid_shape = cells.max(axis=0) + 1
+        if np.prod(grid_shape.astype(np.float64)) >= 2 ** 62:
+            raise ValueError(
+                "`cell_size` ({}) is too small for the extent of the points".format(
+                    cell_size
+                )
+            )
+
+        keys = np.ravel_multi_index(tuple(cells.T), tuple(grid_shape))
+        order = np.argsort(keys, kind="stable")
+        cell_keys, cell_starts, cell_counts = np.unique(
+            keys[order], return_index=True, return_counts=True
+        )
+
+        self.cell_size = float(cell_size)
+        self._origin = lower
+        self._grid_shape = grid_shape
+        self._order = order
+        self._cell_keys = cell_keys
+        self._cell_starts = cell_starts
+        self._cell_counts = cell_counts
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def is_gridded(self) -> bool:
+        """ `False` if the points are queried by brute force."""
+        return self.cell_size is not None
+
+    @property
+    def reference_index(self) -> ReferenceIndex:
+        """ The brute-force index used for high-dimensional points, and for
+        queries that would otherwise span a large fraction of the grid."""
+        if self._reference is None:
+            self._reference = ReferenceIndex(self.points)
+        return self._reference
+
+    def _check_queries(self, x: ndarray) -> ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim != 2 or x.shape[1] != self.points.shape[1]:
+            raise ValueError(
+                "`x` must be a shape-(M, {}) array, got shape {}".format(
+                    self.points.shape[1], x.shape
+                )
+            )
+        return x
+
+    def _offsets(self, radius: float) -> Optional[ndarray]:
+        """ Returns the offsets of the cells that neighbor a query's cell, for a
+        given radius, or `None` if there are more of these than there are occupied
+        cells, in which case a brute-force search is cheaper."""
+        span = int(np.ceil(radius / self.cell_size))
+        dim = self.points.shape[1]
+        if (2 * span + 1) ** dim > len(self._cell_keys):
+            return None
+        axis = np.arange(-span, span + 1)
+        grids = np.meshgrid(*([axis] * dim), indexing="ij")
+        return np.stack(grids, axis=-1).reshape(-1, dim)
+
+    def _neighbor_cells(self, x: ndarray, offsets: ndarray) -> Tuple[ndarray, ndarray]:
+        """ Returns the (query, occupied cell) pairs for a chunk of queries, ordered
+        by query, where each cell is an index into `self._cell_keys`."""
+        span = offsets.max()
+        query_cells = np.floor((x - self._origin) / self.cell_size)
+        # queries far outside of the grid have no neighbors; clipping avoids overflow
+        np.clip(query_cells, -span - 1, self._grid_shape + span, out=query_cells)
+        neighbors = query_cells.astype(np.int64)[:, np.newaxis] + offsets
+
+        in_grid = np.all((neighbors >= 0) & (neighbors < self._grid_shape), axis=-1)
+        queries, which = np.nonzero(in_grid)
+        keys = np.ravel_multi_index(
+            tuple(neighbors[queries, which].T), tuple(self._grid_shape)
+        )
+
+        cell = np.searchsorted(self._cell_keys, keys)
+        cell[cell == len(self._cell_keys)] = 0
+        occupied = self._cell_keys[cell] == keys
+        return queries[occupied], cell[occupied]
+
+    def _radius_pairs(
+        self, x: ndarray, radius: float, queries: ndarray, cell: ndarray
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+        """ Returns the (query, point, distance) triples within `radius`, given the
+        (query, cell) pairs to be examined."""
+        # expand each cell into the positions of its points in `self._order`
+        counts = self._cell_counts[cell]
+        candidates = np.repeat(queries, counts)
+        points = self._order[bucket_positions(self._cell_starts[cell], counts)]
+
+        diffs = x[candidates] - self.points[points]
+        dists = np.sqrt(np.einsum("ij,ij->i", diffs, diffs))
+        within = dists <= radius
+        return candidates[within], points[within], dists[within]
+
+    def query_radius(
+        self, x: ndarray, radius: float
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+        """ Finds, for each query point, all of the indexed points that lie within
+        `radius` of it.
+
+        Queries are processed in chunks whose candidate points - those in the
+        neighboring cells - number at most `_CANDIDATE_BUDGET`, or a single query's
+        worth. Queries that fall in densely-populated cells, such that a large
+        fraction of the indexed points would be examined, are answered by brute
+        force.
+
+        Parameters
+        ----------
+        x : array_like, shape=(M, D)
+            The query points.
+
+        radius : float
+
+        Returns
+        -------
+        Tuple[ndarray, ndarray, ndarray]
+            The neighbors in CSR form: `indptr` (shape-(M + 1,)), `indices` and
+            `dists`, where the neighbors of query point `i` are
+            `indices[indptr[i]:indptr[i + 1]]`, in increasing order, at distances
+            `dists[indptr[i]:indptr[i + 1]]`.
+        """
+        x = self._check_queries(x)
+        if not radius >= 0:
+            raise ValueError("`radius` must be non-negative, got {}".format(radius))
+
+        offsets = self._offsets(radius) if self.is_gridded else None
+        if offsets is None:
+            return self.reference_index.query_radius(x, radius)
+
+        chunk_size = max(1, _QUERY_BUDGET // len(offsets))
+        rows, cols, dists = [], [], []
+        for start in range(0, len(x), chunk_size):
+            chunk = x[start : start + chunk_size]
+            queries, cell = self._neighbor_cells(chunk, offsets)
+            num_candidates = np.bincount(
+                queries, weights=self._cell_counts[cell], minlength=len(chunk)
+            ).astype(np.int64)
+
+            # queries that lie in densely-populated cells are answered by brute force
+            (dense,) = np.nonzero(num_candidates > _BRUTE_FORCE_FRACTION * len(self))
+            if len(dense):
+                indptr, c, d = self.reference_index.query_radius(chunk[dense], radius)
+                rows.append(np.repeat(dense + start, np.diff(indptr)))
+                cols.append(c)
+                dists.append(d)
+                num_candidates[dense] = 0
+                sparse = num_candidates[queries] > 0
+                queries, cell = queries[sparse], cell[sparse]
+            total = np.cumsum(num_candidates)
+
+            # split the chunk such that the candidates of each piece fit the budget
+            lo, done_before = 0, 0
+            while lo < len(chunk):
+                hi = max(
+                    lo + 1,
+                    int(
+                        np.searchsorted(
+                            total, done_before + _CANDIDATE_BUDGET, side="right"
+                        )
+                    ),
+                )
+                pairs = slice(*np.searchsorted(queries, [lo, hi]))
+                r, c, d = self._radius_pairs(chunk, radius, queries[pairs], cell[pairs])
+                rows.append(r + start)
+                cols.append(c)
+                dists.append(d)
+                lo, done_before = hi, total[hi - 1]
+
+        empty = [np.empty(0, dtype=np.intp)]
+        return csr_from_pairs(
+            np.concatenate(empty + rows),
+            np.concatenate(empty + cols),
+            np.concatenate([np.empty(0)] + dists),
+            len(x),
+        )
+
+    def query_knn(self, x: ndarray, k: int) -> Tuple[ndarray, ndarray]:
+        """ Finds the `k` nearest indexed points of each query point.
+
+        The search radius of each query starts at one cell and is doubled until
+        at least `k` points are found within it; queries whose radius would span
+        a large fraction of the grid are answered by brute force.
+
+        Parameters
+        ----------
+        x : array_like, shape=(M, D)
+            The query points.
+
+        k : int
+            The number of neighbors to find, 1 <= k <= N.
+
+        Returns
+        -------
+        Tuple[ndarray, ndarray], shape=(M, k)
+            The Euclidean distances to - and the indices of - the nearest neighbors
+            of each query point, in order of increasing distance.
+        """
+        x = self._check_queries(x)
+        if not 1 <= k <= len(self):
+            raise ValueError(
+                "`k` must be an integer in [1, {}], got {}".format(len(self), k)
+            )
+        if not self.is_gridded:
+            return self.reference_index.knn(x, k)
+
+        dists = np.empty((len(x), k))
+        indices = np.empty((len(x), k), dtype=np.intp)
+        pending = np.arange(len(x))
+        radius = self.cell_size
+        while len(pending):
+            if self._offsets(radius) is None:
+                dists[pending], indices[pending] = knn(x[pending], self.points, k)
+                break
+
+            indptr, cols, hit_dists = self.query_radius(x[pending], radius)
+            counts = np.diff(indptr)
+            rows = np.repeat(np.arange(len(pending)), counts)
+            # every point within the radius of a query with at least k such
+            # points is a candidate for - and includes all of - its k nearest
+            order = np.lexsort((cols, hit_dists, rows))
+
+            (done,) = np.nonzero(counts >= k)
+            nearest = order[indptr[done][:, np.newaxis] + np.arange(k)]
+            dists[pending[done]] = hit_dists[nearest]
+            indices[pending[done]] = cols[nearest]
+
+            pending = pending[counts < k]
+            radius *= 2
+        return dists, indices
+
+    def __repr__(self) -> str:
+        return "{}(num_points={}, dim={}, cell_size={})".format(
+            type(self).__name__, len(self), self.points.shape[1], self.cell_size
+        )
@@ -0,0 +1,189 @@
+"""
+Contains utilities for pushing arrays of points - e.g. shape-(N, 2) arrays of (x, y)
+coordinates that are stored on disk and are too large to hold in memory - through
+the functions of this package in fixed-size chunks.
+"""
+
+import os
+from typing import Callable, Iterable, Iterator, Union
+
+import numpy as np
+from numpy import ndarray
+
+__all__ = ["iter_chunks", "map_chunks", "stream_transform"]
+
+# The default number of rows processed per chunk
+DEFAULT_CHUNK_SIZE = 2 ** 20
+
+ArrayOrPath = Union[ndarray, str, "os.PathLike[str]"]
+
+
+def _open_array(source: ArrayOrPath) -> ndarray:
+    """ Memory-maps `source` (in read-only mode) if it is the path to a .npy file,
+    otherwise it is returned as an array."""
+    if isinstance(source, (str, os.PathLike)):
+        return np.load(source, mmap_mode="r")
+    return np.asarray(source)
+
+
+def iter_chunks(
+    source: ArrayOrPath, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[ndarray]:
+    """
+    Yields consecutive, non-overlapping blocks of (up to) `chunk_size` rows of an array.
+
+    Parameters
+    ----------
+    source : Union[ndarray, PathLike]
+        The array to be chunked, or the path to a .npy file, which will be
+        memory-mapped so that only one chunk at a time is read from disk.
+
+    chunk_size : int, optional (default=DEFAULT_CHUNK_SIZE)
+        The maximum number of rows in each chunk.
+
+    Yields
+    ------
+    chunk : ndarray, shape=(chunk_size, ...)
+        A view of the next block of rows; the final block may be shorter.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> [chunk.tolist() for chunk in iter_chunks(np.arange(5), chunk_size=2)]
+    [[0, 1], [2, 3], [4]]
+    """
+    if chunk_size < 1:
+        raise ValueError(
+            "`chunk_size` must be a positive integer, got {}".format(chunk_size)
+        )
+
+    array = _open_array(source)
+    for start in range(0, array.shape[0], chunk_size):
+        yield array[start : start + chunk_size]
+
+
+def map_chunks(
+    transform: Callable[[ndarray], ndarray], chunks: Iterable[ndarray]
+) -> Iterator[ndarray]:
+    """
+    Lazily applies `transform` to each chunk in a stream of chunks, so that
+    transforms can be chained into generator pipelines.
+
+    Parameters
+    ----------
+    transform : Callable[[ndarray], ndarray]
+        A function that maps a shape-(N, ...) array to a shape-(N, ...) array,
+        e.g. `lambda x: rotate(x, 45.)`.
+
+    chunks : Iterable[ndarray]
+        E.g. the output of `iter_chunks`, or of another call to `map_chunks`.
+
+    Yields
+    ------
+    transformed_chunk : ndarray
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from plymi_mod6.transforms import translate
+    >>> points = np.zeros((3, 2))
+    >>> chunks = iter_chunks(points, chunk_size=2)
+    >>> chunks = map_chunks(lambda x: translate(x, x_shift=1., y_shift=0.), chunks)
+    >>> np.concatenate(list(chunks))
+    array([[1., 0.],
+           [1., 0.],
+           [1., 0.]])
+    """
+    for chunk in chunks:
+        yield transform(chunk)
+
+
+def _transform_chunk(
+    transform: Callable[[ndarray], ndarray], chunk: ndarray
+) -> ndarray:
+    """ Applies `transform` to `chunk`, checking that a row is produced for each of
+    its rows."""
+    result = transform(chunk)
+    if len(result) != len(chunk):
+        raise ValueError(
+            "`transform` must produce a row for each row of its input; it mapped "
+            "a chunk of {} rows to {} rows".format(len(chunk), len(result))
+        )
+    return result
+
+
+def stream_transform(
+    transform: Callable[[ndarray], ndarray],
+    source: ArrayOrPath,
+    dest: Union[str, "os.PathLike[str]"],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> np.memmap:
+    """
+    Applies `transform` to an array, chunk by chunk, writing the results to a
+    memory-mapped .npy file. Thus at most one chunk of the input and of the output
+    need be held in memory at once.
+
+    Parameters
+    ----------
+    transform : Callable[[ndarray], ndarray]
+        A function that maps a shape-(N, ...) array to a shape-(N, ...) array, e.g.
+        `functools.partial(transform_corners, source_corners=s, dest_corners=d)`.
+        The data type and trailing shape of the output file are determined by the
+        result of the first chunk.
+
+    source : Union[ndarray, PathLike]
+        The array to be transformed, or the path to a .npy file, which will be
+        memory-mapped.
+
+    dest : PathLike
+        The path to the .npy file that the result is written to. An existing file
+        will be overwritten; it must not be `source` itself.
+
+    chunk_size : int, optional (default=DEFAULT_CHUNK_SIZE)
+        The maximum number of rows that are transformed at once.
+
+    Returns
+    -------
+    numpy.memmap, shape=(N, ...)
+        The memory-mapped result.
+    """
+    # a memory-mapped array is also read from a file
+    source_path = (
+        source
+        if isinstance(source, (str, os.PathLike))
+        else getattr(source, "filename", None)
+    )
+    if (
+        source_path is not None
+        and os.path.exists(dest)
+        and os.path.samefile(source_path, dest)
+    ):
+        # opening `dest` for writing would truncate the input while it is mapped
+        raise ValueError(
+            "`dest` ({}) must not be the file that `source` is read from".format(dest)
+        )
+
+    array = _open_array(source)
+    chunks = (
+        _transform_chunk(transform, chunk) for chunk in iter_chunks(array, chunk_size)
+    )
+
+    # the result for an empty input is still needed to determine
+    # the data type and shape of the output
+    first = next(chunks, None)
+    if first is None:
+        first = _transform_chunk(transform, array[:0])
+
+    out = np.lib.format.open_memmap(
+        dest, mode="w+", dtype=first.dtype, shape=array.shape[:1] + first.shape[1:]
+    )
+    out[: len(first)] = first
+
+    start = len(first)
+    for chunk in chunks:
+        out[start : start + len(chunk)] = chunk
+        start += len(chunk)
+
+    out.flush()
+    return out
@@ -1,36 +1,392 @@
 """
 Contains implementations of various linear transforms applied to shape-(N, 2) arrays
-of (x, y) coordinates.
+of (x, y) coordinates, along with `Transform`, which fuses a chain of these transforms
+into a single matrix.
 """
 
+import math
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
 import numpy as np
 from numpy import ndarray
 
-__all__ = ["translate", "rotate", "shear", "scale"]
+from plymi_mod6._points import (
+    check_out,
+    check_points,
+    invert_3x3,
+    project_points,
+    resolve_dtype,
+)
+from plymi_mod6.homography import Homography
+
+__all__ = ["translate", "rotate", "shear", "scale", "Transform"]
+
+# The maximum number of distinct angles whose rotation matrix is retained
+ROTATION_CACHE_SIZE = 128
+
+# The maximum number of distinct scalar rotations, shears, and scalings whose
+# (transposed) matrix is retained by `translate`, `rotate`, `shear`, and `scale`
+LINEAR_CACHE_SIZE = 128
+
+# The exact (cos, sin) of 0, 90, 180, and 270 degrees
+_QUARTER_TURN_COS_SIN = ((1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0))
+
+ArrayLike = Union[float, Sequence[float], ndarray]
+
+_SCALAR_TYPES = (int, float, np.generic)
+
 
+def _as_scalars(*params: ArrayLike) -> Optional[Tuple[float, ...]]:
+    """ Returns the transform parameters as Python floats if they are all scalars -
+    the common case, for which the broadcasting of `_check_params` is skipped -
+    otherwise returns `None`."""
+    for param in params:
+        if not isinstance(param, _SCALAR_TYPES):
+            return None
+    return tuple(map(float, params))
 
-def translate(points: ndarray, *, x_shift: float, y_shift: float) -> ndarray:
+
+def _check_params(**params: ArrayLike) -> List[ndarray]:
+    """ Broadcasts the transform parameters against one another; each must either be
+    a scalar or a shape-(K,) array."""
+    for name, value in params.items():
+        if np.ndim(value) > 1:
+            raise ValueError(
+                "`{}` must be a scalar or a shape-(K,) array, got shape {}".format(
+                    name, np.shape(value)
+                )
+            )
+    return np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in params.values())
+    )
+
+
+def _stack_2x2(m00: ndarray, m01: ndarray, m10: ndarray, m11: ndarray) -> ndarray:
+    """ Assembles (a stack of) 2x2 matrices from their broadcast-compatible elements.
+
+    Returns
+    -------
+    ndarray, shape=(..., 2, 2)
+    """
+    m00, m01, m10, m11 = np.broadcast_arrays(m00, m01, m10, m11)
+    return np.stack([np.stack([m00, m01], -1), np.stack([m10, m11], -1)], -2)
+
+
+def _quarter_turns(deg_rot: float) -> Optional[int]:
+    """ Returns the number of CCW quarter turns, in [0, 4), that `deg_rot` degrees
+    amounts to, or `None` if `deg_rot` is not a multiple of 90."""
+    quarter_turns = deg_rot / 90
+    if not math.isfinite(quarter_turns) or quarter_turns != round(quarter_turns):
+        return None
+    return int(quarter_turns) % 4
+
+
+@lru_cache(maxsize=ROTATION_CACHE_SIZE)
+def _cached_rotation_matrix(deg_rot: float) -> ndarray:
+    quarter_turns = _quarter_turns(deg_rot)
+    if quarter_turns is not None:
+        cos, sin = _QUARTER_TURN_COS_SIN[quarter_turns]
+    elif not math.isfinite(deg_rot):
+        # matches `np.cos` and `np.sin`, whereas `math.cos(inf)` raises
+        cos = sin = math.nan
+    else:
+        angle_rad = math.radians(deg_rot)
+        cos, sin = math.cos(angle_rad), math.sin(angle_rad)
+    matrix = np.array([[cos, -sin], [sin, cos]])
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _rotation_matrix(deg_rot: ArrayLike) -> ndarray:
+    """ Returns the shape-(..., 2, 2) matrices that rotate points CCW by `deg_rot`
+    degrees. The matrices for multiples of 90 degrees are exact.
+
+    The (read-only) matrix for a scalar angle is cached."""
+    deg_rot = np.asarray(deg_rot, dtype=np.float64)
+    if deg_rot.ndim == 0:
+        return _cached_rotation_matrix(float(deg_rot))
+
+    angle_rad = np.radians(deg_rot)
+    cos, sin = np.cos(angle_rad), np.sin(angle_rad)
+
+    with np.errstate(invalid="ignore"):
+        quarter_turns = deg_rot / 90
+        exact = np.isfinite(quarter_turns) & (quarter_turns == np.round(quarter_turns))
+    quarter_turns = np.mod(quarter_turns[exact], 4).astype(np.intp)
+    cos[exact] = np.array(_QUARTER_TURN_COS_SIN)[quarter_turns, 0]
+    sin[exact] = np.array(_QUARTER_TURN_COS_SIN)[quarter_turns, 1]
+    return _stack_2x2(cos, -sin, sin, cos)
+
+
+def _rotate_quarter_turns(
+    points: ndarray, quarter_turns: int, out: Optional[ndarray], dtype: np.dtype
+) -> ndarray:
+    """ Rotates points by a multiple of 90 degrees by swapping and negating their
+    columns, which is exact and avoids a matmul. `out` may be `points` itself."""
+    if out is None:
+        out = np.empty(points.shape, dtype=dtype)
+
+    if quarter_turns == 2:
+        # (x, y) -> (-x, -y)
+        return np.negative(points, out=out)
+
+    if quarter_turns == 0:
+        if out is not points:
+            out[...] = points
+        return out
+
+    x, y = points[..., 0], points[..., 1]
+    # the cheap, conservative check merely risks an unneeded copy
+    if np.may_share_memory(out, points):
+        x = x.copy()
+
+    if quarter_turns == 1:
+        # (x, y) -> (-y, x)
+        np.negative(y, out=out[..., 0])
+        out[..., 1] = x
+    else:
+        # (x, y) -> (y, -x)
+        out[..., 0] = y
+        np.negative(x, out=out[..., 1])
+    return out
+
+
+def _shear_matrix(x_shear: ArrayLike, y_shear: ArrayLike) -> ndarray:
+    return _stack_2x2(1.0, x_shear, y_shear, 1.0)
+
+
+def _scale_matrix(x_scale: ArrayLike, y_scale: ArrayLike) -> ndarray:
+    return _stack_2x2(x_scale, 0.0, 0.0, y_scale)
+
+
+@lru_cache(maxsize=LINEAR_CACHE_SIZE)
+def _cached_linear_transpose(kind: str, a: float, b: float) -> Tuple[ndarray, bool]:
+    """ Returns the (read-only) transpose of the 2x2 matrix of a scalar 'rotate'
+    (by `a` degrees), 'shear', or 'scale' (by `a` along x and `b` along y), and
+    whether its entries are all integers."""
+    if kind == "rotate":
+        matrix = _cached_rotation_matrix(a)
+    elif kind == "shear":
+        matrix = _shear_matrix(a, b)
+    else:
+        matrix = _scale_matrix(a, b)
+    transpose = np.ascontiguousarray(matrix.T)
+    transpose.flags.writeable = False
+    return transpose, _is_integral(transpose)
+
+
+def _affine_matrix(
+    linear: Optional[ndarray] = None, x_shift: float = 0.0, y_shift: float = 0.0
+) -> ndarray:
+    """ Returns the shape-(3, 3) matrix of the affine transform
+    `p -> linear @ p + shift`, which acts on homogeneous (x, y, 1) coordinates."""
+    matrix = np.eye(3)
+    if linear is not None:
+        matrix[:2, :2] = linear
+    matrix[:2, 2] = x_shift, y_shift
+    return matrix
+
+
+def _is_integral(array: ndarray) -> bool:
+    with np.errstate(invalid="ignore"):
+        return bool(np.all(np.mod(array, 1) == 0))
+
+
+def _prepare(
+    points: ndarray, out: Optional[ndarray], inplace: bool, exact: bool
+) -> Tuple[ndarray, Optional[ndarray], np.dtype]:
+    """ Resolves the array that a transform's result is written to, and the data type
+    in which the transform is carried out.
+
+    The transform is carried out in the data type of `out` (or of `points`, if `out`
+    is not specified) if it is a floating-point type. Integer coordinates undergo an
+    exact transform - i.e. one that maps integer coordinates to integer coordinates -
+    in int-64, so that narrow and unsigned integer types cannot wrap around; they are
+    otherwise transformed in float-64.
+
+    Returns
+    -------
+    Tuple[ndarray, Optional[ndarray], numpy.dtype]
+        points, out, dtype
+    """
+    if inplace:
+        if out is not None:
+            raise ValueError("`out` cannot be specified when `inplace=True`")
+        if not isinstance(points, ndarray):
+            raise ValueError("`points` must be a numpy array when `inplace=True`")
+        out = points
+
+    points = np.asarray(points)
+    dtype = points.dtype if out is None else out.dtype
+    # checking the kind of a dtype is far cheaper than `np.issubdtype`
+    if dtype.kind == "f":
+        return points, out, dtype
+    if exact and points.dtype.kind in "iu":
+        # e.g. uint-64 coordinates are transformed in float-64
+        dtype = np.result_type(dtype, np.int64)
+        if dtype.kind == "i":
+            return points.astype(dtype, copy=False), out, dtype
+    if out is not None:
+        raise ValueError(
+            "The transform does not map integer coordinates to integer coordinates, "
+            "thus its result cannot be written to an array of dtype {}".format(
+                out.dtype
+            )
+        )
+    return points, out, np.dtype(np.float64)
+
+
+# Passing `out=None` to a ufunc is measurably slower than using an operator, for
+# the small arrays for which per-call overhead matters
+
+
+def _add(points: ndarray, shifts: ndarray, out: Optional[ndarray]) -> ndarray:
+    return points + shifts if out is None else np.add(points, shifts, out=out)
+
+
+def _matmul(points: ndarray, matrix: ndarray, out: Optional[ndarray]) -> ndarray:
+    return points @ matrix if out is None else np.matmul(points, matrix, out=out)
+
+
+def _transform(
+    points: ndarray,
+    out: Optional[ndarray],
+    inplace: bool,
+    exact: bool,
+    compute: Callable[[ndarray, Optional[ndarray], np.dtype], ndarray],
+) -> ndarray:
+    """ Carries out `compute(points, out, dtype)` in the data type resolved by
+    `_prepare`.
+
+    An exact transform that targets a narrower integer `out` (including `points`
+    itself, when `inplace=True`) is computed in int-64 and then written to `out`,
+    provided that the result fits in its data type."""
+    if out is None and not inplace and type(points) is ndarray:
+        # the common case: a floating-point result of the same data type as `points`
+        dtype = points.dtype
+        if dtype.kind == "f":
+            return compute(points, None, dtype)
+    points, out, dtype = _prepare(points, out, inplace, exact)
+    if out is None or out.dtype == dtype:
+        return compute(points, out, dtype)
+
+    result = compute(points, None, dtype)
+    info = np.iinfo(out.dtype)
+    if result.size and not (info.min <= result.min() and result.max() <= info.max):
+        raise ValueError(
+            "The transformed coordinates do not fit in an array of dtype {}".format(
+                out.dtype
+            )
+        )
+    out[...] = result
+    return out
+
+
+def _apply_linear(
+    points: ndarray,
+    matrix: ndarray,
+    out: Optional[ndarray] = None,
+    inplace: bool = False,
+) -> ndarray:
+    """ Applies (a stack of K) 2x2 matrices to a shape-(N, 2) array of points in a
+    single (stacked) matmul.
+
+    Returns
+    -------
+    ndarray, shape=(N, 2) or shape=(K, N, 2)
+    """
+    transposed = np.swapaxes(matrix, -1, -2)
+    return _transform(
+        points,
+        out,
+        inplace,
+        exact=_is_integral(matrix),
+        compute=lambda p, o, dtype: _matmul(p, transposed.astype(dtype), o),
+    )
+
+
+def _apply_scalar_linear(
+    points: ndarray,
+    kind: str,
+    a: float,
+    b: float,
+    out: Optional[ndarray],
+    inplace: bool,
+) -> ndarray:
+    """ Applies a scalar rotation, shear, or scaling - see `_cached_linear_transpose`
+    - to a shape-(N, 2) array of points, reusing its cached matrix."""
+    transpose, exact = _cached_linear_transpose(kind, a, b)
+    return _transform(
+        points,
+        out,
+        inplace,
+        exact=exact,
+        compute=lambda p, o, dtype: _matmul(p, transpose.astype(dtype, copy=False), o),
+    )
+
+
+def translate(
+    points: ndarray,
+    *,
+    x_shift: ArrayLike,
+    y_shift: ArrayLike,
+    out: Optional[ndarray] = None,
+    inplace: bool = False
+) -> ndarray:
     """
        [(x1, y1), (x2, y2), ...] -> [(x1 + dx, y1 + dy), (x2 + dx, y2 + dy), ...]
 
     Parameters
     ----------
     points : ndarray, shape=(N, 2)
-        Length-N array of (x, y) coordinates
+        Length-N array of (x, y) coordinates. Floating-point data types are
+        preserved. Integer coordinates are transformed in int-64 if the transform
+        maps integer coordinates to integer coordinates, otherwise in float-64.
+
+    x_shift : Union[float, ndarray], shape-(K,)
+
+    y_shift : Union[float, ndarray], shape-(K,)
+        If either shift is an array, each of the K shifts is applied
+        to all of the points.
 
-    x_shift : float
+    out : Optional[ndarray], shape=(N, 2) or shape=(K, N, 2)
+        If specified, the result is written to this array, which is then returned.
 
-    y_shift : float
+    inplace : bool, optional (default=False)
+        If `True`, the result is written to `points` itself.
 
     Returns
     -------
-    translated_points : ndarray, shape=(N, 2)
+    translated_points : ndarray, shape=(N, 2) or shape=(K, N, 2)
         Length-N array of (x, y) coordinates, each translated by `(x_shift, y_shift)`
     """
-    return points + np.array([x_shift, y_shift])
+    scalars = _as_scalars(x_shift, y_shift)
+    if scalars is not None:
+        shifts = np.array(scalars)
+        exact = scalars[0].is_integer() and scalars[1].is_integer()
+    else:
+        x_shift, y_shift = _check_params(x_shift=x_shift, y_shift=y_shift)
+        shifts = np.stack([x_shift, y_shift], axis=-1)
+        if shifts.ndim == 2:
+            shifts = shifts[:, np.newaxis]
+        exact = _is_integral(shifts)
+    return _transform(
+        points,
+        out,
+        inplace,
+        exact=exact,
+        compute=lambda p, o, dtype: _add(p, shifts.astype(dtype, copy=False), o),
+    )
 
 
-def rotate(points: ndarray, deg_rot: float) -> ndarray:
+def rotate(
+    points: ndarray,
+    deg_rot: ArrayLike,
+    *,
+    out: Optional[ndarray] = None,
+    inplace: bool = False
+) -> ndarray:
     """
     Rotates each (x, y) point CCW relative to +x by the specified number of degrees.
 
@@ -39,82 +395,333 @@ def rotate(points: ndarray, deg_rot: float) -> ndarray:
     Parameters
     ----------
     points : ndarray, shape=(N, 2)
-        Length-N array of (x, y) coordinates
+        Length-N array of (x, y) coordinates. Floating-point data types are
+        preserved. Integer coordinates are transformed in int-64 if the transform
+        maps integer coordinates to integer coordinates, otherwise in float-64.
+
+    deg_rot : Union[float, ndarray], shape-(K,)
+        The degrees to rotate a point (x, y) CCW relative to +x. If an array
+        of K angles is provided, each rotation is applied to all of the points.
+
+    out : Optional[ndarray], shape=(N, 2) or shape=(K, N, 2)
+        If specified, the result is written to this array, which is then returned.
 
-    deg_rot : float
-        The degrees to rotate a point (x, y) CCW relative to +x
+    inplace : bool, optional (default=False)
+        If `True`, the result is written to `points` itself.
 
     Returns
     -------
-    translated_points : ndarray, shape=(N, 2)
+    translated_points : ndarray, shape=(N, 2) or shape=(K, N, 2)
         Length-N array of (x, y) coordinates, each having been rotated by
         the amount `deg_rot`.
-    """
-    angle_rad = deg_rot * np.pi / 180
-
-    rot_matrix = np.array(
-        [
-            [np.cos(angle_rad), -np.sin(angle_rad)],
-            [np.sin(angle_rad), np.cos(angle_rad)],
-        ]
-    )
 
-    return np.matmul(points, rot_matrix.T)
+    Examples
+    --------
+    >>> import numpy as np
+    >>> rotate(np.array([[1., 0.]]), [0., 180.]).round(12)
+    array([[[ 1.,  0.]],
+    <BLANKLINE>
+           [[-1.,  0.]]])
+    """
+    scalars = _as_scalars(deg_rot)
+    if scalars is None:
+        (deg_rot,) = _check_params(deg_rot=deg_rot)
+        if deg_rot.ndim == 0:
+            scalars = (float(deg_rot),)
+    if scalars is not None:
+        quarter_turns = _quarter_turns(scalars[0])
+        if quarter_turns is not None:
+            return _transform(
+                points,
+                out,
+                inplace,
+                exact=True,
+                compute=lambda p, o, dtype: _rotate_quarter_turns(
+                    p, quarter_turns, o, dtype
+                ),
+            )
+        return _apply_scalar_linear(points, "rotate", scalars[0], 0.0, out, inplace)
+    return _apply_linear(points, _rotation_matrix(deg_rot), out=out, inplace=inplace)
 
 
-def shear(points: ndarray, *, x_shear: float, y_shear: float) -> ndarray:
+def shear(
+    points: ndarray,
+    *,
+    x_shear: ArrayLike,
+    y_shear: ArrayLike,
+    out: Optional[ndarray] = None,
+    inplace: bool = False
+) -> ndarray:
     """
     Applies a shear along the x and y dimensions to each (x, y) point
 
     Parameters
     ----------
     points : ndarray, shape=(N, 2)
-        Length-N array of (x, y) coordinates
+        Length-N array of (x, y) coordinates. Floating-point data types are
+        preserved. Integer coordinates are transformed in int-64 if the transform
+        maps integer coordinates to integer coordinates, otherwise in float-64.
 
-    x_shear : float
+    x_shear : Union[float, ndarray], shape-(K,)
         The shear factor applied along the x-axis
 
-    y_shear : float
-        The shear factor applied along the y-axis
+    y_shear : Union[float, ndarray], shape-(K,)
+        The shear factor applied along the y-axis. If either factor is an array,
+        each of the K shears is applied to all of the points.
+
+    out : Optional[ndarray], shape=(N, 2) or shape=(K, N, 2)
+        If specified, the result is written to this array, which is then returned.
+
+    inplace : bool, optional (default=False)
+        If `True`, the result is written to `points` itself.
 
     Returns
     -------
-    translated_points : ndarray, shape=(N, 2)
+    translated_points : ndarray, shape=(N, 2) or shape=(K, N, 2)
         Length-N array of (x, y) that have undergone shearing
     """
-    shear_matrix = np.array(
-        [
-            [1.0, x_shear],
-            [y_shear, 1.0],
-        ]
+    scalars = _as_scalars(x_shear, y_shear)
+    if scalars is not None:
+        return _apply_scalar_linear(points, "shear", *scalars, out, inplace)
+    x_shear, y_shear = _check_params(x_shear=x_shear, y_shear=y_shear)
+    return _apply_linear(
+        points, _shear_matrix(x_shear, y_shear), out=out, inplace=inplace
     )
-    return np.matmul(points, shear_matrix.T)
 
 
-def scale(points: ndarray, *, x_scale: float, y_scale: float) -> ndarray:
+def scale(
+    points: ndarray,
+    *,
+    x_scale: ArrayLike,
+    y_scale: ArrayLike,
+    out: Optional[ndarray] = None,
+    inplace: bool = False
+) -> ndarray:
     """
     Applies a scale along the x and y dimensions to each (x, y) point
 
     Parameters
     ----------
     points : ndarray, shape=(N, 2)
-        Length-N array of (x, y) coordinates
+        Length-N array of (x, y) coordinates. Floating-point data types are
+        preserved. Integer coordinates are transformed in int-64 if the transform
+        maps integer coordinates to integer coordinates, otherwise in float-64.
 
-    x_scale : float
+    x_scale : Union[float, ndarray], shape-(K,)
         The scale factor applied along the x-axis
 
-    y_scale : float
-        The scale factor applied along the y-axis
+    y_scale : Union[float, ndarray], shape-(K,)
+        The scale factor applied along the y-axis. If either factor is an array,
+        each of the K scalings is applied to all of the points.
+
+    out : Optional[ndarray], shape=(N, 2) or shape=(K, N, 2)
+        If specified, the result is written to this array, which is then returned.
+
+    inplace : bool, optional (default=False)
+        If `True`, the result is written to `points` itself.
 
     Returns
     -------
-    translated_points : ndarray, shape=(N, 2)
+    translated_points : ndarray, shape=(N, 2) or shape=(K, N, 2)
         Length-N array of (x, y) that have undergone scale
     """
-    scale_matrix = np.array(
-        [
-            [x_scale, 0.0],
-            [0.0, y_scale],
-        ]
+    scalars = _as_scalars(x_scale, y_scale)
+    if scalars is not None:
+        return _apply_scalar_linear(points, "scale", *scalars, out, inplace)
+    x_scale, y_scale = _check_params(x_scale=x_scale, y_scale=y_scale)
+    return _apply_linear(
+        points, _scale_matrix(x_scale, y_scale), out=out, inplace=inplace
     )
-    return np.matmul(points, scale_matrix.T)
+
+
+class Transform:
+    """ A chain of transforms - translations, rotations, shears, scalings, and
+    projective transforms - that is folded into a single 3x3 matrix, which acts on
+    homogeneous (x, y, 1) coordinates.
+
+    Adding a step to the chain only updates the 3x3 matrix; the points themselves are
+    transformed once, in a single pass, by `Transform.apply`. Transforms are
+    immutable: each method returns a new `Transform`.
+
+    Transforms compose like their matrices: `(t2 @ t1).apply(points)` is equivalent
+    to `t2.apply(t1.apply(points))`. A `Homography` can appear on either side of
+    `@`, in which case the result is a projective `Transform`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> points = np.array([[1., 0.], [0., 1.]])
+    >>> t = Transform().rotate(90.).translate(x_shift=1., y_shift=0.)
+    >>> np.round(t.apply(points), 12)
+    array([[1., 1.],
+           [0., 0.]])
+    >>> np.round(t.inverse().apply(t.apply(points)), 12)
+    array([[1., 0.],
+           [0., 1.]])
+    """
+
+    def __init__(self):
+        self._matrix = np.eye(3)
+        self._matrix.flags.writeable = False
+
+    @classmethod
+    def from_matrix(cls, matrix: ndarray) -> "Transform":
+        """ Creates a transform directly from its 3x3 matrix.
+
+        Parameters
+        ----------
+        matrix : array_like, shape=(3, 3)
+            The matrix that maps homogeneous (x, y, 1) coordinates to transformed
+            homogeneous coordinates.
+
+        Returns
+        -------
+        Transform
+        """
+        matrix = np.array(matrix, dtype=np.float64)
+        if matrix.shape != (3, 3):
+            raise ValueError(
+                "`matrix` must be array-like with shape-(3, 3), got shape {}".format(
+                    matrix.shape
+                )
+            )
+        out = cls.__new__(cls)
+        out._matrix = matrix
+        out._matrix.flags.writeable = False
+        return out
+
+    @classmethod
+    def from_homography(cls, homography: Homography) -> "Transform":
+        """ Creates a transform that performs the given homography.
+
+        Parameters
+        ----------
+        homography : Homography
+
+        Returns
+        -------
+        Transform
+        """
+        return cls.from_matrix(homography.matrix)
+
+    def to_homography(self) -> Homography:
+        """ Returns the `Homography` that performs this transform.
+
+        Returns
+        -------
+        Homography
+        """
+        return Homography.from_matrix(self._matrix)
+
+    @property
+    def matrix(self) -> ndarray:
+        """ The (read-only) shape-(3, 3) matrix of the fused transform."""
+        return self._matrix
+
+    @property
+    def is_affine(self) -> bool:
+        """ `True` if the transform is affine (i.e. not projective), in which case
+        it is applied without the per-point perspective division."""
+        return bool(np.all(self._matrix[2] == (0.0, 0.0, 1.0)))
+
+    def then(self, other: Union["Transform", Homography, ndarray]) -> "Transform":
+        """ Returns the transform that performs this transform followed by `other`.
+
+        Parameters
+        ----------
+        other : Union[Transform, Homography, array_like]
+            Another transform, a homography, or a shape-(3, 3) matrix.
+
+        Returns
+        -------
+        Transform
+        """
+        return type(self).from_matrix(np.matmul(_as_matrix(other), self._matrix))
+
+    def translate(self, *, x_shift: float, y_shift: float) -> "Transform":
+        """ Appends a translation to the chain; see `transforms.translate`."""
+        return self.then(_affine_matrix(x_shift=x_shift, y_shift=y_shift))
+
+    def rotate(self, deg_rot: float) -> "Transform":
+        """ Appends a rotation to the chain; see `transforms.rotate`."""
+        return self.then(_affine_matrix(_rotation_matrix(deg_rot)))
+
+    def shear(self, *, x_shear: float, y_shear: float) -> "Transform":
+        """ Appends a shear to the chain; see `transforms.shear`."""
+        return self.then(_affine_matrix(_shear_matrix(x_shear, y_shear)))
+
+    def scale(self, *, x_scale: float, y_scale: float) -> "Transform":
+        """ Appends a scaling to the chain; see `transforms.scale`."""
+        return self.then(_affine_matrix(_scale_matrix(x_scale, y_scale)))
+
+    def inverse(self) -> "Transform":
+        """ Returns the transform that undoes this transform.
+
+        Returns
+        -------
+        Transform
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inverse = invert_3x3(self._matrix)
+        if not np.all(np.isfinite(inverse)):
+            raise ValueError("The transform is singular and cannot be inverted")
+        return type(self).from_matrix(inverse)
+
+    def apply(
+        self,
+        points: ndarray,
+        *,
+        out: Optional[ndarray] = None,
+        dtype: Optional[np.dtype] = None
+    ) -> ndarray:
+        """ Performs the fused transform on a sequence of 2D points.
+
+        Parameters
+        ----------
+        points : array_like, shape=(N, 2)
+            Length-N array of (x, y) coordinates
+
+        out : Optional[numpy.ndarray], shape=(N, 2)
+            If specified, the transformed points are written to this array, which
+            is then returned. `out` may be `points` itself.
+
+        dtype : Optional[numpy.dtype]
+            The floating-point data type in which the transform is carried
+            out. Defaults to the data type of `out`, or float-64 if `out` is
+            not specified.
+
+        Returns
+        -------
+        ndarray, shape=(N, 2)
+            Length-N array of transformed (x, y) coordinates
+        """
+        points = check_points(points, resolve_dtype(dtype, out))
+        out = check_out(out, points)
+        if not self.is_affine:
+            return project_points(self._matrix, points, out=out)
+
+        matrix = self._matrix.astype(points.dtype, copy=False)
+        out = np.matmul(points, matrix[:2, :2].T, out=out)
+        out += matrix[:2, 2]
+        return out
+
+    def __matmul__(self, other: Union["Transform", Homography]) -> "Transform":
+        if not isinstance(other, (Transform, Homography)):
+            return NotImplemented
+        return type(self).from_matrix(np.matmul(self._matrix, other.matrix))
+
+    def __rmatmul__(self, other: Homography) -> "Transform":
+        if not isinstance(other, Homography):
+            return NotImplemented
+        return type(self).from_matrix(np.matmul(other.matrix, self._matrix))
+
+    def __repr__(self) -> str:
+        return "{}.from_matrix({})".format(
+            type(self).__name__, np.array2string(self._matrix, separator=", ")
+        )
+
+
+def _as_matrix(transform: Union[Transform, Homography, ndarray]) -> ndarray:
+    if isinstance(transform, (Transform, Homography)):
+        return transform.matrix
+    return Transform.from_matrix(transform).matrix
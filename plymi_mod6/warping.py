@@ -0,0 +1,622 @@
+"""
+Contains functions for warping images via the projective transforms provided by
+`plymi_mod6.homography`, along with precomputed remap tables for repeatedly warping
+images with a fixed transform (e.g. frames from a static camera).
+
+Pixel (row, col) of an image is treated as residing at the coordinate (x, y) = (col, row).
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from numpy import ndarray
+
+from plymi_mod6._parallel import run_threaded
+from plymi_mod6.homography import get_homography
+
+__all__ = [
+    "warp_image",
+    "RemapTable",
+    "compute_remap_table",
+    "remap_key",
+    "cached_remap_table",
+]
+
+# The default side-length, in pixels, of the square tiles that an output image is
+# processed in
+DEFAULT_TILE_SIZE = 256
+
+_INTERPOLATIONS = ("nearest", "bilinear")
+
+# Bilinear samples whose in-image weights sum to within this of 1 are treated as
+# lying inside of the image; the weights are float-32, so their sum is inexact
+_WEIGHT_TOL = 1e-6
+
+
+def _pixel_coords(rows: slice, cols: slice) -> ndarray:
+    """
+    Returns the (x, y) coordinates of a rectangular block of pixels, in row-major order.
+
+    Parameters
+    ----------
+    rows : slice
+    cols : slice
+
+    Returns
+    -------
+    ndarray, shape=(num_rows * num_cols, 2)
+    """
+    ys, xs = np.mgrid[rows, cols]
+    return np.stack([xs.ravel(), ys.ravel()], axis=1).astype(np.float64)
+
+
+def _tiles(height: int, width: int, tile_size: int) -> List[Tuple[slice, slice]]:
+    """ Returns the (rows, cols) slices of the square tiles that cover a
+    height x width image, in row-major order."""
+    if tile_size < 1:
+        raise ValueError(
+            "`tile_size` must be a positive integer, got {}".format(tile_size)
+        )
+    return [
+        (slice(r, min(r + tile_size, height)), slice(c, min(c + tile_size, width)))
+        for r in range(0, height, tile_size)
+        for c in range(0, width, tile_size)
+    ]
+
+
+def _sampling_table(
+    coords: ndarray, input_shape: Tuple[int, int], interpolation: str
+) -> Tuple[ndarray, Optional[ndarray]]:
+    """
+    Determines the pixels - and their weights - of an image of shape `input_shape`
+    that must be sampled in order to interpolate the image at each coordinate.
+
+    Parameters
+    ----------
+    coords : ndarray, shape=(P, 2)
+        The (x, y) coordinates at which the image is to be sampled.
+
+    input_shape : Tuple[int, int]
+        The (height, width) of the image being sampled.
+
+    interpolation : str
+        "nearest" or "bilinear"
+
+    Returns
+    -------
+    Tuple[ndarray, Optional[ndarray]]
+        indices : The flat (raveled) indices of the pixels being sampled; -1 indicates
+        that a coordinate falls outside of the image. For "nearest" interpolation, this
+        has shape-(P,). For "bilinear" interpolation, this has shape-(P, 4): the four
+        neighboring pixels of each coordinate.
+
+        weights : None for "nearest" interpolation; otherwise the shape-(P, 4)
+        float-32 bilinear weights. The weight of a neighbor that falls outside of the
+        image is 0, and the remaining weight (1 - sum(weights)) is assigned to the
+        fill value.
+    """
+    height, width = input_shape
+    index_dtype = np.int32 if height * width < np.iinfo(np.int32).max else np.int64
+    x, y = coords[:, 0], coords[:, 1]
+
+    if interpolation == "nearest":
+        with np.errstate(invalid="ignore"):
+            col = np.floor(x + 0.5)
+            row = np.floor(y + 0.5)
+            valid = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+        indices = np.full(len(coords), -1, dtype=index_dtype)
+        indices[valid] = row[valid] * width + col[valid]
+        return indices, None
+
+    with np.errstate(invalid="ignore"):
+        col0 = np.floor(x)
+        row0 = np.floor(y)
+    frac_x = (x - col0).astype(np.float32)
+    frac_y = (y - row0).astype(np.float32)
+
+    indices = np.full((len(coords), 4), -1, dtype=index_dtype)
+    weights = np.zeros((len(coords), 4), dtype=np.float32)
+    neighbors = [
+        (0, 0, (1 - frac_y) * (1 - frac_x)),
+        (0, 1, (1 - frac_y) * frac_x),
+        (1, 0, frac_y * (1 - frac_x)),
+        (1, 1, frac_y * frac_x),
+    ]
+    for k, (drow, dcol, weight) in enumerate(neighbors):
+        row, col = row0 + drow, col0 + dcol
+        with np.errstate(invalid="ignore"):
+            valid = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+        indices[valid, k] = row[valid] * width + col[valid]
+        weights[valid, k] = weight[valid]
+    return indices, weights
+
+
+def _gather(
+    flat_image: ndarray,
+    indices: ndarray,
+    weights: Optional[ndarray],
+    fill_value: float,
+    out: ndarray,
+):
+    """
+    Samples pixels from an image, as prescribed by `_sampling_table`.
+
+    Parameters
+    ----------
+    flat_image : ndarray, shape=(H * W, C)
+        The image being sampled, with its spatial dimensions raveled.
+
+    indices : ndarray, shape=(P,) or shape=(P, 4)
+    weights : Optional[ndarray], shape=(P, 4)
+        See `_sampling_table`.
+
+    fill_value : float
+        The value assigned to samples that fall outside of the image.
+
+    out : ndarray, shape=(P, C)
+        The array in which the samples are stored.
+    """
+    if weights is None:
+        np.take(flat_image, indices, axis=0, out=out, mode="clip")
+        out[indices < 0] = fill_value
+        return
+
+    work_dtype = np.result_type(flat_image.dtype, np.float32)
+    acc = np.zeros(out.shape, dtype=work_dtype)
+    for k in range(indices.shape[1]):
+        # invalid neighbors have zero-weight, thus their (clipped) index is benign
+        acc += weights[:, k, np.newaxis] * np.take(
+            flat_image, indices[:, k], axis=0, mode="clip"
+        )
+    if fill_value:
+        # the fill is only applied where it has weight, lest e.g. a NaN fill value
+        # spread to samples that lie inside of the image
+        missing = 1 - weights.sum(axis=1)
+        (outside,) = np.nonzero(missing > _WEIGHT_TOL)
+        acc[outside] += missing[outside, np.newaxis] * fill_value
+
+    if np.issubdtype(out.dtype, np.integer):
+        info = np.iinfo(out.dtype)
+        np.rint(acc, out=acc)
+        np.clip(acc, info.min, info.max, out=acc)
+    out[...] = acc
+
+
+def _check_image(image: ndarray) -> ndarray:
+    image = np.asarray(image)
+    if image.ndim not in (2, 3):
+        raise ValueError(
+            "`image` must be array-like with shape-(H, W) or shape-(H, W, C), "
+            "got shape {}".format(image.shape)
+        )
+    return image
+
+
+def _check_interpolation(interpolation: str):
+    if interpolation not in _INTERPOLATIONS:
+        raise ValueError(
+            "`interpolation` must be one of {}, got {!r}".format(
+                _INTERPOLATIONS, interpolation
+            )
+        )
+
+
+def warp_image(
+    image: ndarray,
+    source_corners: ndarray,
+    dest_corners: ndarray,
+    output_shape: Tuple[int, int],
+    interpolation: str = "nearest",
+    *,
+    fill_value: float = 0,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    n_workers: Optional[int] = None
+) -> ndarray:
+    """
+    Warps an image via the projective transform that maps `source_corners` onto
+    `dest_corners`.
+
+    Each pixel of the output image is mapped back into the input image (i.e. inverse
+    mapping), where it is sampled. The output image is processed in square tiles,
+    so that the memory consumed by intermediate coordinates and indices is bounded
+    by the tile size, rather than by the size of the output image.
+
+    Parameters
+    ----------
+    image : array_like, shape=(H, W) or shape=(H, W, C)
+        The image to be warped, e.g. a uint8 or float32 array.
+
+    source_corners : array_like, shape=(4, 2)
+        The (x, y) pixel coordinates of four corners in the input image.
+
+    dest_corners : array_like, shape=(4, 2)
+        The corresponding (x, y) pixel coordinates of the corners in the output image.
+
+    output_shape : Tuple[int, int]
+        The (height, width) of the output image.
+
+    interpolation : str, optional (default="nearest")
+        "nearest" or "bilinear"
+
+    fill_value : float, optional (default=0)
+        The value assigned to output pixels that map outside of the input image.
+
+    tile_size : int, optional (default=DEFAULT_TILE_SIZE)
+        The side-length of the square tiles in which the output is processed.
+
+    n_workers : Optional[int]
+        If specified, tiles are processed concurrently on a pool of this many threads
+        (NumPy releases the GIL during the heavy array operations).
+
+    Returns
+    -------
+    ndarray, shape=(output_height, output_width) or shape=(output_height, output_width, C)
+        The warped image, which has the same data type as `image`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> image = np.arange(9, dtype=np.uint8).reshape(3, 3)
+    >>> corners = np.array([[0., 0.], [1., 0.], [1., 1.], [0., 1.]])
+    >>> # shift the image one pixel to the right
+    >>> warp_image(image, corners, corners + [1., 0.], output_shape=(3, 3))
+    array([[0, 0, 1],
+           [0, 3, 4],
+           [0, 6, 7]], dtype=uint8)
+    """
+    image = _check_image(image)
+    _check_interpolation(interpolation)
+
+    # output coordinates -> input coordinates
+    homography = get_homography(dest_corners, source_corners)
+
+    height, width = output_shape
+    num_channels = image.shape[2] if image.ndim == 3 else 1
+    flat_image = image.reshape(image.shape[0] * image.shape[1], num_channels)
+    out = np.empty((height, width) + image.shape[2:], dtype=image.dtype)
+    flat_out = out.reshape(height, width, num_channels)
+
+    def warp_tile(tile: Tuple[slice, slice]):
+        rows, cols = tile
+        coords = _pixel_coords(rows, cols)
+        homography.apply(coords, out=coords)
+        indices, weights = _sampling_table(coords, image.shape[:2], interpolation)
+
+        samples = np.empty((len(coords), num_channels), dtype=image.dtype)
+        _gather(flat_image, indices, weights, fill_value, out=samples)
+        flat_out[rows, cols] = samples.reshape(
+            rows.stop - rows.start, cols.stop - cols.start, num_channels
+        )
+
+    tiles = _tiles(height, width, tile_size)
+
+    run_threaded(warp_tile, tiles, n_workers)
+    return out
+
+
+class RemapTable:
+    """ A precomputed pixel-to-pixel mapping between an input image and a warped
+    output image.
+
+    Because the mapping depends only on the corners and the image shapes, a table
+    can be computed once (see `compute_remap_table`) and then applied to any number
+    of frames; each application is reduced to a gather of the input's pixels.
+
+    Parameters
+    ----------
+    indices : ndarray, shape=(P,) or shape=(P, 4)
+        The flat indices of the input pixels sampled for each of the P output
+        pixels; -1 indicates a sample that falls outside of the input image.
+
+    weights : Optional[ndarray], shape=(P, 4)
+        The bilinear weights of the sampled pixels, or None for nearest-neighbor
+        sampling.
+
+    input_shape : Tuple[int, int]
+        The (height, width) of the images that the table is applied to.
+
+    output_shape : Tuple[int, int]
+        The (height, width) of the warped images.
+    """
+
+    def __init__(
+        self,
+        indices: ndarray,
+        weights: Optional[ndarray],
+        input_shape: Tuple[int, int],
+        output_shape: Tuple[int, int],
+    ):
+        self.input_shape = tuple(int(i) for i in input_shape)
+        self.output_shape = tuple(int(i) for i in output_shape)
+        num_pixels = self.output_shape[0] * self.output_shape[1]
+        expected_ndim = 1 if weights is None else 2
+        if indices.ndim != expected_ndim or len(indices) != num_pixels:
+            raise ValueError(
+                "`indices` has shape {}, which is inconsistent with an output "
+                "shape of {}".format(indices.shape, self.output_shape)
+            )
+        if weights is not None and weights.shape != indices.shape:
+            raise ValueError(
+                "`weights` must have the same shape as `indices`, got {} and "
+                "{}".format(weights.shape, indices.shape)
+            )
+        self.indices = indices
+        self.weights = weights
+
+    @property
+    def interpolation(self) -> str:
+        """ "nearest" or "bilinear" """
+        return "nearest" if self.weights is None else "bilinear"
+
+    def apply(
+        self, image: ndarray, *, fill_value: float = 0, out: Optional[ndarray] = None
+    ) -> ndarray:
+        """ Warps an image by sampling it as prescribed by the table.
+
+        Parameters
+        ----------
+        image : array_like, shape=(H, W) or shape=(H, W, C)
+            An image whose spatial shape matches `input_shape`.
+
+        fill_value : float, optional (default=0)
+            The value assigned to output pixels that map outside of the input image.
+
+        out : Optional[ndarray]
+            If specified, the warped image is written to this array (whose shape
+            and data type must match that of the result), which is then returned.
+
+        Returns
+        -------
+        ndarray, shape=(output_height, output_width) or shape=(output_height, output_width, C)
+            The warped image, which has the same data type as `image`.
+        """
+        image = _check_image(image)
+        if image.shape[:2] != self.input_shape:
+            raise ValueError(
+                "The table was computed for images of shape {}, got an image of "
+                "shape {}".format(self.input_shape, image.shape[:2])
+            )
+
+        num_channels = image.shape[2] if image.ndim == 3 else 1
+        out_shape = self.output_shape + image.shape[2:]
+        if out is None:
+            out = np.empty(out_shape, dtype=image.dtype)
+        elif out.shape != out_shape or out.dtype != image.dtype:
+            raise ValueError(
+                "`out` must have shape {} and dtype {}, got shape {} and dtype "
+                "{}".format(out_shape, image.dtype, out.shape, out.dtype)
+            )
+
+        # reshaping a non-contiguous `out` would silently produce a copy, thus the
+        # samples are instead gathered into a contiguous buffer and copied to `out`
+        target = out if out.flags.c_contiguous else np.empty(out_shape, out.dtype)
+
+        flat_image = image.reshape(image.shape[0] * image.shape[1], num_channels)
+        _gather(
+            flat_image,
+            self.indices,
+            self.weights,
+            fill_value,
+            out=target.reshape(len(self.indices), num_channels),
+        )
+        if target is not out:
+            out[...] = target
+        return out
+
+    def save(self, path: Union[str, "os.PathLike[str]"]):
+        """ Saves the table to a .npz file.
+
+        Parameters
+        ----------
+        path : PathLike
+        """
+        arrays = dict(
+            indices=self.indices,
+            input_shape=np.array(self.input_shape),
+            output_shape=np.array(self.output_shape),
+        )
+        if self.weights is not None:
+            arrays["weights"] = self.weights
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: Union[str, "os.PathLike[str]"]) -> "RemapTable":
+        """ Loads a table that was saved via `RemapTable.save`.
+
+        Parameters
+        ----------
+        path : PathLike
+
+        Returns
+        -------
+        RemapTable
+        """
+        with np.load(path) as data:
+            return cls(
+                data["indices"],
+                data["weights"] if "weights" in data.files else None,
+                tuple(data["input_shape"]),
+                tuple(data["output_shape"]),
+            )
+
+    def __repr__(self) -> str:
+        return "{}(interpolation={!r}, input_shape={}, output_shape={})".format(
+            type(self).__name__, self.interpolation, self.input_shape, self.output_shape
+        )
+
+
+def compute_remap_table(
+    source_corners: ndarray,
+    dest_corners: ndarray,
+    input_shape: Tuple[int, int],
+    output_shape: Tuple[int, int],
+    interpolation: str = "nearest",
+    *,
+    tile_size: int = DEFAULT_TILE_SIZE
+) -> RemapTable:
+    """
+    Precomputes the mapping performed by `warp_image` for the given corners and
+    image shapes, so that it can be applied to many images.
+
+    Parameters
+    ----------
+    source_corners : array_like, shape=(4, 2)
+        The (x, y) pixel coordinates of four corners in the input image.
+
+    dest_corners : array_like, shape=(4, 2)
+        The corresponding (x, y) pixel coordinates of the corners in the output image.
+
+    input_shape : Tuple[int, int]
+        The (height, width) of the input images.
+
+    output_shape : Tuple[int, int]
+        The (height, width) of the output images.
+
+    interpolation : str, optional (default="nearest")
+        "nearest" or "bilinear"
+
+    tile_size : int, optional (default=DEFAULT_TILE_SIZE)
+        The side-length of the square tiles in which the table is computed; this
+        bounds the memory consumed by the intermediate float-64 coordinates.
+
+    Returns
+    -------
+    RemapTable
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> corners = np.array([[0., 0.], [1., 0.], [1., 1.], [0., 1.]])
+    >>> table = compute_remap_table(corners, corners + [1., 0.], (3, 3), (3, 3))
+    >>> table.apply(np.arange(9).reshape(3, 3))
+    array([[0, 0, 1],
+           [0, 3, 4],
+           [0, 6, 7]])
+    """
+    _check_interpolation(interpolation)
+    height, width = output_shape
+    tiles = _tiles(height, width, tile_size)
+    homography = get_homography(dest_corners, source_corners)
+
+    index_shape = (height, width) if interpolation == "nearest" else (height, width, 4)
+    indices = None
+    weights = None
+    for rows, cols in tiles:
+        coords = _pixel_coords(rows, cols)
+        homography.apply(coords, out=coords)
+        tile_indices, tile_weights = _sampling_table(coords, input_shape, interpolation)
+        if indices is None:
+            indices = np.empty(index_shape, dtype=tile_indices.dtype)
+            if tile_weights is not None:
+                weights = np.empty(index_shape, dtype=tile_weights.dtype)
+
+        tile_shape = (rows.stop - rows.start, cols.stop - cols.start)
+        indices[rows, cols] = tile_indices.reshape(tile_shape + index_shape[2:])
+        if weights is not None:
+            weights[rows, cols] = tile_weights.reshape(tile_shape + index_shape[2:])
+
+    if indices is None:  # the output image is empty
+        indices = np.empty(index_shape, dtype=np.int32)
+        if interpolation == "bilinear":
+            weights = np.empty(index_shape, dtype=np.float32)
+
+    num_pixels = height * width
+    return RemapTable(
+        indices.reshape((num_pixels,) + index_shape[2:]),
+        None if weights is None else weights.reshape(num_pixels, 4),
+        input_shape,
+        output_shape,
+    )
+
+
+def remap_key(
+    source_corners: ndarray,
+    dest_corners: ndarray,
+    input_shape: Tuple[int, int],
+    output_shape: Tuple[int, int],
+    interpolation: str = "nearest",
+) -> str:
+    """
+    Returns a hash that uniquely identifies the remap table for the given corners,
+    image shapes, and interpolation method.
+
+    Returns
+    -------
+    str
+        A hexadecimal SHA-1 digest.
+    """
+    digest = hashlib.sha1()
+    for corners in (source_corners, dest_corners):
+        digest.update(np.ascontiguousarray(corners, dtype=np.float64).tobytes())
+    digest.update(
+        repr(
+            (
+                tuple(int(i) for i in input_shape),
+                tuple(int(i) for i in output_shape),
+                interpolation,
+            )
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def cached_remap_table(
+    source_corners: ndarray,
+    dest_corners: ndarray,
+    input_shape: Tuple[int, int],
+    output_shape: Tuple[int, int],
+    interpolation: str = "nearest",
+    *,
+    cache_dir: Union[str, "os.PathLike[str]"]
+) -> RemapTable:
+    """
+    Returns the remap table for the given corners, image shapes, and interpolation
+    method, loading it from `cache_dir` if it was previously computed, otherwise
+    computing it and saving it there.
+
+    Tables are stored as `<cache_dir>/remap-<key>.npz`, where the key is given by
+    `remap_key`.
+
+    Parameters
+    ----------
+    source_corners : array_like, shape=(4, 2)
+    dest_corners : array_like, shape=(4, 2)
+    input_shape : Tuple[int, int]
+    output_shape : Tuple[int, int]
+    interpolation : str, optional (default="nearest")
+        See `compute_remap_table`.
+
+    cache_dir : PathLike
+        The directory in which tables are stored; it is created if necessary.
+
+    Returns
+    -------
+    RemapTable
+    """
+    _check_interpolation(interpolation)
+    key = remap_key(
+        source_corners, dest_corners, input_shape, output_shape, interpolation
+    )
+    path = os.path.join(cache_dir, "remap-{}.npz".format(key))
+    if os.path.exists(path):
+        return RemapTable.load(path)
+
+    table = compute_remap_table(
+        source_corners, dest_corners, input_shape, output_shape, interpolation
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # the table is written to a temporary file that is then renamed into place, so
+    # that concurrent readers - or a crash mid-write - never see a truncated file
+    fd, tmp_path = tempfile.mkstemp(suffix=".npz", prefix=".remap-", dir=cache_dir)
+    os.close(fd)
+    try:
+        table.save(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return table
@@ -7,7 +7,7 @@ setup(
     author="A Fastidious PLYMI Reader",
     author_email="plymi.rocks@plymi.com",
     description="A template Python package for learning about testing",
-    install_requires=["numpy >= 1.10.0"],
+    install_requires=["numpy >= 1.15.0"],
     tests_require=["pytest", "hypothesis"],
     python_requires=">=3.6",
 )
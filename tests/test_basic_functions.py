@@ -5,8 +5,13 @@ from string import printable
 import hypothesis.strategies as st
 import pytest
 from hypothesis import given, note
+from numpy.testing import assert_array_equal
 
-from plymi_mod6.basic_functions import count_vowels, merge_max_mappings
+from plymi_mod6.basic_functions import (
+    count_vowels,
+    count_vowels_batch,
+    merge_max_mappings,
+)
 
 
 ##################################
@@ -126,6 +131,20 @@ def test_count_vowels_hypothesis(not_vowels: str, vowels_but_not_ys: str, ys: st
     assert count_vowels(in_string, include_y=True) == len(vowels_but_not_ys) + len(ys)
 
 
+@given(strings=st.lists(st.text()), include_y=st.booleans())
+def test_count_vowels_batch_matches_count_vowels(strings, include_y: bool):
+    # `st.text()` generates arbitrary unicode, including non-ASCII
+    # look-alikes of vowels (e.g. "é"), which are not counted
+    counts = count_vowels_batch(iter(strings), include_y=include_y)
+    assert counts.shape == (len(strings),)
+    assert_array_equal(
+        counts, [count_vowels(x, include_y=include_y) for x in strings]
+    )
+
+    vowels = set("aeiouAEIOUyY" if include_y else "aeiouAEIOU")
+    assert counts.tolist() == [sum(char in vowels for char in x) for x in strings]
+
+
 @given(
     dict1=st.dictionaries(
         keys=st.integers(-10, 10) | st.text(), values=st.integers(-10, 10)
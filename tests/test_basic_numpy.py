@@ -2,9 +2,24 @@ import hypothesis.extra.numpy as hnp
 import hypothesis.strategies as st
 import numpy as np
 from hypothesis import given
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_array_equal
 
-from plymi_mod6.numpy_functions import pairwise_dists
+from plymi_mod6.numpy_functions import (
+    DEFAULT_MEMORY_BUDGET,
+    MIN_BLOCK_ROWS,
+    LSHIndex,
+    ReferenceIndex,
+    condensed_index,
+    iter_pairs_within,
+    knn,
+    pairs_within,
+    pairwise_dists,
+    pairwise_reduce,
+    pdist,
+    squareform,
+    _block_shape,
+    _iter_dist_blocks,
+)
 
 import pytest
 
@@ -112,3 +127,387 @@ def test_pairwise_dists_is_translation_invariant(
     dists_w_offset = pairwise_dists(array_a + offset, array_b + offset)
 
     assert_allclose(dists, dists_w_offset, atol=1e-4, rtol=1e-4)
+
+
+def _reference_dists(x, y):
+    return np.sqrt(np.sum((x[:, np.newaxis] - y) ** 2, axis=-1))
+
+
+@given(
+    shapes=hnp.mutually_broadcastable_shapes(
+        signature="(n,d),(m,d)->(n,m)", max_dims=0
+    ),
+    memory_budget=st.integers(1, 2000),
+    data=st.data(),
+)
+def test_blocked_pairwise_dists_matches_reference(
+    shapes: hnp.BroadcastableShapes, memory_budget: int, data: st.DataObject
+):
+    shape_a, shape_b = shapes.input_shapes
+    array_a = data.draw(
+        hnp.arrays(shape=shape_a, dtype=np.float64, elements=st.floats(-1e3, 1e3)),
+        label="array_a",
+    )
+    array_b = data.draw(
+        hnp.arrays(shape=shape_b, dtype=np.float64, elements=st.floats(-1e3, 1e3)),
+        label="array_b",
+    )
+    dists = pairwise_dists(array_a, array_b, memory_budget=memory_budget)
+    assert_allclose(dists, _reference_dists(array_a, array_b), atol=1e-4, rtol=1e-6)
+
+
+@pytest.mark.usefixtures("cleandir")
+@pytest.mark.parametrize("memory_budget", [8, 1000, None])
+def test_pairwise_dists_into_memmap(memory_budget):
+    rng = np.random.RandomState(0)
+    x = rng.rand(37, 3)
+    y = rng.rand(23, 3)
+    out = np.lib.format.open_memmap(
+        "dists.npy", mode="w+", dtype=x.dtype, shape=(37, 23)
+    )
+
+    assert pairwise_dists(x, y, out=out, memory_budget=memory_budget) is out
+    assert_allclose(np.load("dists.npy"), _reference_dists(x, y), atol=1e-12)
+
+
+def test_pairwise_dists_into_out():
+    rng = np.random.RandomState(1)
+    x = rng.rand(10, 4)
+    y = rng.rand(12, 4)
+    out = np.full((10, 12), np.nan)
+    assert pairwise_dists(x, y, out=out, memory_budget=100) is out
+    assert_allclose(out, _reference_dists(x, y), atol=1e-12)
+
+    with pytest.raises(ValueError):
+        pairwise_dists(x, y, out=np.empty((12, 10)))
+
+
+@pytest.mark.parametrize("num_cols", [1000, 300000])
+def test_blocks_span_multiple_rows_for_many_columns(num_cols: int):
+    # blocks that span entire rows of a wide matrix would each be a single row,
+    # i.e. a matrix-vector product
+    block_rows, block_cols = _block_shape(256, num_cols, 8, DEFAULT_MEMORY_BUDGET)
+    assert block_rows >= MIN_BLOCK_ROWS
+    assert block_rows * block_cols * 8 <= DEFAULT_MEMORY_BUDGET
+
+    rng = np.random.RandomState(2)
+    x = rng.rand(20, 3)
+    y = rng.rand(num_cols, 3)
+    out = np.full((20, num_cols), np.nan)
+    for rows, cols, block in _iter_dist_blocks(x, y, 8000, out=out):
+        assert block.shape == (20, cols.stop - cols.start)
+        assert np.shares_memory(block, out)
+    assert_allclose(out, _reference_dists(x, y), atol=1e-12)
+
+
+def _reference_metric(x, y, metric):
+    diffs = x[:, np.newaxis] - y
+    if metric == "sqeuclidean":
+        return np.sum(diffs ** 2, axis=-1)
+    if metric == "manhattan":
+        return np.abs(diffs).sum(axis=-1)
+    if metric == "chebyshev":
+        return np.abs(diffs).max(axis=-1, initial=0.0)
+    if metric == "cosine":
+        x_norms = np.linalg.norm(x, axis=1)[:, np.newaxis]
+        y_norms = np.linalg.norm(y, axis=1)
+        return 1 - (x @ y.T) / (x_norms * y_norms)
+    return _reference_dists(x, y)
+
+
+@pytest.mark.parametrize(
+    "metric", ["euclidean", "sqeuclidean", "cosine", "manhattan", "chebyshev"]
+)
+@pytest.mark.parametrize("memory_budget", [8, 200, None])
+def test_metrics_match_broadcasted_reference(metric: str, memory_budget):
+    rng = np.random.RandomState(0)
+    x = rng.uniform(-1, 1, size=(17, 5))
+    y = rng.uniform(-1, 1, size=(23, 5))
+    full = _reference_metric(x, y, metric)
+
+    actual = pairwise_dists(x, y, metric=metric, memory_budget=memory_budget)
+    assert_allclose(actual, full, atol=1e-12)
+
+    out = np.empty_like(full)
+    assert pairwise_dists(x, y, metric=metric, out=out) is out
+    assert_allclose(out, full, atol=1e-12)
+
+    i, j = np.triu_indices(len(x), k=1)
+    assert_allclose(
+        pdist(x, metric=metric, memory_budget=memory_budget),
+        _reference_metric(x, x, metric)[i, j],
+        atol=1e-12,
+    )
+
+    _, indices = knn(x, y, 3, metric=metric, memory_budget=memory_budget)
+    assert_array_equal(indices, np.argsort(full, axis=1)[:, :3])
+    assert_array_equal(
+        pairwise_reduce(x, y, "argmax", metric=metric, memory_budget=memory_budget),
+        full.argmax(axis=1),
+    )
+
+    threshold = np.median(full)
+    expected_i, expected_j = np.nonzero(full <= threshold)
+    hit_i, hit_j, _ = pairs_within(x, y, threshold, metric=metric)
+    assert_array_equal(hit_i, expected_i)
+    assert_array_equal(hit_j, expected_j)
+
+
+def test_cosine_distance_of_zero_vector_and_bad_metric():
+    x = np.array([[0.0, 0.0], [1.0, 0.0]])
+    y = np.array([[2.0, 0.0], [0.0, 3.0], [-1.0, 0.0]])
+    assert_allclose(
+        pairwise_dists(x, y, metric="cosine"),
+        [[1.0, 1.0, 1.0], [0.0, 1.0, 2.0]],
+        atol=1e-15,
+    )
+    with pytest.raises(ValueError):
+        pairwise_dists(x, y, metric="hamming")
+
+
+@pytest.mark.parametrize("metric", ["euclidean", "manhattan"])
+@pytest.mark.parametrize("memory_budget", [8, 1000, None])
+def test_parallel_pairwise_dists_is_deterministic(metric: str, memory_budget):
+    rng = np.random.RandomState(0)
+    x = rng.rand(57, 6)
+    y = rng.rand(31, 6)
+    serial = pairwise_dists(x, y, metric=metric, memory_budget=memory_budget)
+    assert_allclose(serial, _reference_metric(x, y, metric), atol=1e-12)
+
+    for n_workers in [2, 3, 8]:
+        out = np.full_like(serial, np.nan)
+        parallel = pairwise_dists(
+            x,
+            y,
+            metric=metric,
+            out=out,
+            memory_budget=memory_budget,
+            n_workers=n_workers,
+        )
+        assert parallel is out
+        assert_array_equal(parallel, serial)
+
+
+@pytest.mark.parametrize("metric", ["euclidean", "sqeuclidean"])
+@pytest.mark.parametrize("offset", [0.0, 1e3])
+@pytest.mark.parametrize("n_workers", [None, 3])
+def test_float32_precision_refines_near_pairs(metric: str, offset: float, n_workers):
+    rng = np.random.RandomState(0)
+    x = rng.rand(40, 3) + offset
+    # near-duplicates, whose float-32 expansion suffers from cancellation
+    y = np.concatenate([rng.rand(30, 3) + offset, x[:5] + 1e-6, x[5:8]])
+    full = _reference_metric(x, y, metric)
+
+    dists = pairwise_dists(
+        x, y, metric=metric, precision="float32", memory_budget=500, n_workers=n_workers
+    )
+    assert dists.dtype == np.float32
+    assert_allclose(dists, full, rtol=5e-5)
+    assert_array_equal(dists[np.arange(5, 8), np.arange(35, 38)], 0.0)
+
+    with pytest.raises(ValueError):
+        pairwise_dists(x, y, metric="cosine", precision="float32")
+    with pytest.raises(ValueError):
+        pairwise_dists(x, y, precision="float16")
+
+
+@pytest.mark.parametrize("op", ["min", "argmin", "max", "argmax", "sum"])
+@pytest.mark.parametrize("axis", [0, 1])
+@pytest.mark.parametrize("memory_budget", [8, 200, None])
+def test_pairwise_reduce_matches_full_reduction(op: str, axis: int, memory_budget):
+    rng = np.random.RandomState(0)
+    x = rng.rand(17, 3)
+    # duplicated rows produce ties, which resolve to the first index
+    y = np.concatenate([rng.rand(20, 3), x[:3], x[:3]])
+    full = _reference_dists(x, y)
+
+    actual = pairwise_reduce(x, y, op, axis=axis, memory_budget=memory_budget)
+    desired = getattr(full, op)(axis=axis)
+    assert actual.shape == desired.shape
+    if op.startswith("arg"):
+        assert_array_equal(actual, desired)
+    else:
+        assert_allclose(actual, desired, atol=1e-12)
+
+
+def test_pairwise_reduce_bad_inputs_raise():
+    x = np.zeros((2, 3))
+    with pytest.raises(ValueError):
+        pairwise_reduce(x, x, "median")
+    with pytest.raises(ValueError):
+        pairwise_reduce(x, x, "min", axis=2)
+    with pytest.raises(ValueError):
+        pairwise_reduce(x, np.zeros((0, 3)), "argmin")
+    assert_array_equal(pairwise_reduce(x, np.zeros((0, 3)), "sum"), [0.0, 0.0])
+
+
+@pytest.mark.parametrize("k", [1, 3, 20])
+@pytest.mark.parametrize("memory_budget", [8, 200, None])
+def test_knn_matches_sorted_pairwise_dists(k: int, memory_budget):
+    rng = np.random.RandomState(0)
+    x = rng.rand(17, 3)
+    y = rng.rand(20, 3)
+    full = _reference_dists(x, y)
+    expected_indices = np.argsort(full, axis=1)[:, :k]
+
+    dists, indices = knn(x, y, k, memory_budget=memory_budget)
+    assert dists.shape == indices.shape == (17, k)
+    assert_array_equal(indices, expected_indices)
+    assert_allclose(dists, np.take_along_axis(full, expected_indices, axis=1))
+
+
+@pytest.mark.parametrize("k", [0, 21])
+def test_knn_bad_k_raises(k: int):
+    with pytest.raises(ValueError):
+        knn(np.zeros((2, 3)), np.zeros((20, 3)), k)
+
+
+@pytest.mark.parametrize("memory_budget", [8, 200, None])
+def test_reference_index_matches_module_functions(memory_budget):
+    rng = np.random.RandomState(0)
+    y = rng.rand(40, 3)
+    x = rng.rand(9, 3)
+    index = ReferenceIndex(y)
+    full = _reference_dists(x, y)
+
+    assert_allclose(index.dists(x, memory_budget=memory_budget), full, atol=1e-12)
+
+    dists, indices = index.knn(x, 5, memory_budget=memory_budget)
+    expected_dists, expected_indices = knn(x, y, 5)
+    assert_array_equal(indices, expected_indices)
+    assert_allclose(dists, expected_dists)
+
+    indptr, indices, dists = index.query_radius(x, 0.4, memory_budget=memory_budget)
+    assert indptr.shape == (10,)
+    for i in range(len(x)):
+        (expected,) = np.nonzero(full[i] <= 0.4)
+        assert_array_equal(indices[indptr[i] : indptr[i + 1]], expected)
+        assert_allclose(dists[indptr[i] : indptr[i + 1]], full[i, expected])
+
+
+@pytest.mark.usefixtures("cleandir")
+def test_reference_index_float32_and_memmap():
+    rng = np.random.RandomState(1)
+    y = rng.rand(30, 4)
+    x = rng.rand(6, 4)
+
+    index = ReferenceIndex(y, dtype=np.float32)
+    assert index.y.dtype == index.y_sq_norms.dtype == np.float32
+    assert index.dists(x).dtype == np.float32
+    assert_allclose(index.dists(x), _reference_dists(x, y), rtol=1e-5, atol=1e-5)
+
+    index.save("index")
+    loaded = ReferenceIndex.load("index")
+    assert isinstance(loaded.y, np.memmap)
+    assert_array_equal(loaded.dists(x), index.dists(x))
+
+
+@pytest.mark.parametrize("memory_budget", [8, 2000, None])
+def test_lsh_index_returns_exact_distances_of_candidates(memory_budget):
+    rng = np.random.RandomState(0)
+    centers = rng.normal(scale=5.0, size=(10, 6))
+    y = centers[rng.randint(10, size=500)] + rng.normal(size=(500, 6))
+    x = centers[rng.randint(10, size=40)] + rng.normal(size=(40, 6))
+
+    index = LSHIndex(y, n_tables=16, n_bits=4, seed=0)
+    dists, indices = index.query(x, 5, memory_budget=memory_budget)
+    assert dists.shape == indices.shape == (40, 5)
+    assert np.all(np.diff(dists, axis=1) >= 0)
+    assert_allclose(
+        dists, np.take_along_axis(_reference_dists(x, y), indices, axis=1), atol=1e-12
+    )
+    assert index.recall(x, 5) >= 0.9
+
+    # the same seed yields the same buckets
+    other = LSHIndex(y, n_tables=16, n_bits=4, seed=0)
+    assert_array_equal(other.query(x, 5)[1], indices)
+
+
+def test_lsh_index_falls_back_to_exact_search():
+    rng = np.random.RandomState(1)
+    y = rng.rand(50, 3)
+    x = rng.rand(7, 3)
+    # buckets this small rarely hold k points, so most queries are exact
+    index = LSHIndex(y, n_tables=1, n_bits=30, seed=0)
+    dists, indices = index.query(x, 20)
+    expected_dists, expected_indices = knn(x, y, 20)
+    assert_array_equal(indices, expected_indices)
+    assert_allclose(dists, expected_dists)
+    assert index.recall(x, 20) == 1.0
+
+    with pytest.raises(ValueError):
+        LSHIndex(y, n_bits=63)
+    with pytest.raises(ValueError):
+        index.query(x, 51)
+
+
+@pytest.mark.parametrize("memory_budget", [8, 200, None])
+@pytest.mark.parametrize("max_dist", [0.0, 0.3, 10.0])
+def test_pairs_within_matches_thresholded_dists(memory_budget, max_dist: float):
+    rng = np.random.RandomState(0)
+    x = rng.rand(15, 3)
+    y = np.concatenate([rng.rand(25, 3), x[:2]])
+    full = _reference_dists(x, y)
+    expected_i, expected_j = np.nonzero(full <= max_dist)
+
+    i, j, dists = pairs_within(x, y, max_dist, memory_budget=memory_budget)
+    assert_array_equal(i, expected_i)
+    assert_array_equal(j, expected_j)
+    assert_allclose(dists, full[expected_i, expected_j], atol=1e-7)
+
+    blocks = list(iter_pairs_within(x, y, max_dist, memory_budget=memory_budget))
+    pairs = sorted(
+        (a, b) for block_i, block_j, _ in blocks for a, b in zip(block_i, block_j)
+    )
+    assert pairs == list(zip(expected_i, expected_j))
+
+
+@given(
+    x=hnp.arrays(
+        shape=st.tuples(st.integers(0, 12), st.integers(1, 4)),
+        dtype=np.float64,
+        elements=st.floats(-1e3, 1e3),
+    ),
+    memory_budget=st.integers(1, 2000),
+)
+def test_pdist_matches_upper_triangle(x: np.ndarray, memory_budget: int):
+    n = len(x)
+    condensed = pdist(x, memory_budget=memory_budget)
+    assert condensed.shape == (n * (n - 1) // 2,)
+
+    full = _reference_dists(x, x)
+    i, j = np.triu_indices(n, k=1)
+    assert_allclose(condensed, full[i, j], atol=1e-4, rtol=1e-6)
+    if n:
+        assert_array_equal(condensed_index(i, j, n), np.arange(len(i)))
+        assert_array_equal(condensed_index(j, i, n), np.arange(len(i)))
+
+    if n == 0:
+        return
+
+    square = squareform(condensed)
+    assert square.shape == (n, n)
+    assert_array_equal(np.diag(square), 0.0)
+    assert_array_equal(square, square.T)
+    assert_allclose(square, full, atol=1e-4, rtol=1e-6)
+
+
+@pytest.mark.usefixtures("cleandir")
+def test_pdist_into_memmap():
+    x = np.random.RandomState(0).rand(30, 3)
+    out = np.lib.format.open_memmap(
+        "pdist.npy", mode="w+", dtype=x.dtype, shape=(435,)
+    )
+    assert pdist(x, out=out, memory_budget=100) is out
+    assert_allclose(
+        squareform(np.load("pdist.npy")), _reference_dists(x, x), atol=1e-12
+    )
+
+
+def test_condensed_helpers_validate_inputs():
+    with pytest.raises(ValueError):
+        condensed_index(2, 2, n=4)
+    with pytest.raises(ValueError):
+        condensed_index(0, 4, n=4)
+    with pytest.raises(ValueError):
+        squareform(np.zeros(4))
@@ -3,10 +3,18 @@ from typing import Callable
 import hypothesis.extra.numpy as hnp
 import hypothesis.strategies as st
 import numpy as np
+import pytest
 from hypothesis import given
 from numpy.testing import assert_allclose
 
-from plymi_mod6.homography import transform_corners
+from plymi_mod6.homography import (
+    Homography,
+    estimate_homography,
+    get_homography,
+    ransac_homography,
+    transform_corners,
+    transform_corners_batch,
+)
 from plymi_mod6.transforms import rotate, scale, shear, translate
 
 from .custom_strategies import quad_corners
@@ -288,3 +296,316 @@ def test_metamorphic_translation(
         atol=1e-6,
         rtol=1e-6,
     )
+
+
+@given(
+    corner_pairs=st.lists(
+        st.tuples(quad_corners(), quad_corners()), min_size=1, max_size=5
+    ),
+    num_points=st.integers(0, 10),
+    data=st.data(),
+)
+def test_batch_matches_transform_corners(
+    corner_pairs, num_points: int, data: st.DataObject
+):
+    source_corners = np.stack([src for src, _ in corner_pairs])
+    dest_corners = np.stack([dst for _, dst in corner_pairs])
+    points = data.draw(
+        hnp.arrays(
+            shape=(len(corner_pairs), num_points, 2),
+            dtype=np.float64,
+            elements=st.floats(-1e2, 1e2),
+        ),
+        label="points",
+    )
+
+    actual = transform_corners_batch(
+        points, source_corners=source_corners, dest_corners=dest_corners
+    )
+    desired = np.stack(
+        [
+            transform_corners(pts, source_corners=src, dest_corners=dst)
+            for pts, src, dst in zip(points, source_corners, dest_corners)
+        ]
+    ).reshape(points.shape)
+    assert_allclose(actual=actual, desired=desired, atol=1e-6, rtol=1e-6)
+
+    # ragged, index-tagged form
+    frame_index = np.repeat(np.arange(len(corner_pairs)), num_points)
+    actual_ragged = transform_corners_batch(
+        points.reshape(-1, 2),
+        source_corners=source_corners,
+        dest_corners=dest_corners,
+        frame_index=frame_index,
+    )
+    assert_allclose(
+        actual=actual_ragged, desired=desired.reshape(-1, 2), atol=1e-6, rtol=1e-6
+    )
+
+
+@pytest.mark.parametrize("frame_index", [[0, -1], [0, 1], [0.0, 0.0]])
+def test_batch_bad_frame_index_raises(frame_index):
+    corners = np.array([[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]])
+    with pytest.raises(ValueError):
+        transform_corners_batch(
+            np.zeros((2, 2)),
+            source_corners=corners,
+            dest_corners=corners,
+            frame_index=frame_index,
+        )
+
+
+@given(
+    source_corners=quad_corners(),
+    dest_corners=quad_corners(),
+    points=hnp.arrays(
+        shape=st.tuples(st.integers(0, 10), st.just(2)),
+        dtype=np.float64,
+        elements=st.floats(-1e2, 1e2),
+    ),
+)
+def test_homography_matches_transform_corners(
+    source_corners: np.ndarray, dest_corners: np.ndarray, points: np.ndarray
+):
+    homography = Homography(source_corners, dest_corners)
+    desired = transform_corners(
+        points, source_corners=source_corners, dest_corners=dest_corners
+    )
+    assert_allclose(actual=homography.apply(points), desired=desired)
+
+    # the inverse homography maps the destination corners back to the source
+    assert_allclose(
+        actual=homography.inverse().apply(dest_corners),
+        desired=source_corners,
+        atol=1e-6,
+        rtol=1e-6,
+    )
+
+
+def test_get_homography_is_cached():
+    get_homography.cache_clear()
+    corners = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+
+    first = get_homography(corners, 2 * corners)
+    second = get_homography(corners.copy(), 2 * corners)
+    third = get_homography(corners, 3 * corners)
+
+    assert first is second
+    assert first is not third
+    info = get_homography.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+    # cached homographies are shared, and thus must not be mutable
+    with pytest.raises(ValueError):
+        first.matrix[0, 0] = 10.0
+
+
+@given(
+    source_corners=quad_corners(),
+    dest_corners=quad_corners(),
+    points=hnp.arrays(
+        shape=st.tuples(st.integers(0, 10), st.just(2)),
+        dtype=np.float64,
+        elements=st.floats(-1e2, 1e2),
+    ),
+)
+def test_transform_corners_out_and_dtype(
+    source_corners: np.ndarray, dest_corners: np.ndarray, points: np.ndarray
+):
+    desired = transform_corners(
+        points, source_corners=source_corners, dest_corners=dest_corners
+    )
+
+    # writing to a provided buffer
+    out = np.full_like(points, np.nan)
+    actual = transform_corners(
+        points, source_corners=source_corners, dest_corners=dest_corners, out=out
+    )
+    assert actual is out
+    assert_allclose(actual=actual, desired=desired)
+
+    # performing the transform in-place
+    in_place = points.copy()
+    transform_corners(
+        in_place, source_corners=source_corners, dest_corners=dest_corners, out=in_place
+    )
+    assert_allclose(actual=in_place, desired=desired)
+
+
+def test_transform_corners_float32():
+    source_corners = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    dest_corners = np.array([[0.0, 0.0], [2.0, 0.0], [3.0, 3.0], [0.0, 1.0]])
+    points = np.random.RandomState(0).uniform(-10, 10, size=(100, 2))
+
+    desired = transform_corners(
+        points, source_corners=source_corners, dest_corners=dest_corners
+    )
+    actual = transform_corners(
+        points.astype(np.float32),
+        source_corners=source_corners,
+        dest_corners=dest_corners,
+        dtype=np.float32,
+    )
+    assert actual.dtype == np.float32
+    assert_allclose(actual=actual, desired=desired, atol=1e-4, rtol=1e-4)
+
+
+def test_transform_corners_out_validation():
+    corners = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    points = np.zeros((3, 2))
+    with pytest.raises(ValueError):
+        transform_corners(
+            points, source_corners=corners, dest_corners=corners, out=np.zeros((2, 2))
+        )
+    with pytest.raises(ValueError):
+        transform_corners(
+            points,
+            source_corners=corners,
+            dest_corners=corners,
+            out=np.zeros((3, 2)),
+            dtype=np.float32,
+        )
+
+
+@pytest.mark.parametrize(
+    "corners",
+    [
+        np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0]]),  # p1, p2, p3
+        np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [2.0, 2.0]]),  # p1, p3, p4
+        np.array([[1.0, 1.0], [1.0, 1.0], [2.0, 0.0], [0.0, 1.0]]),  # repeated
+    ],
+)
+def test_collinear_corners_raise(corners: np.ndarray):
+    square = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    points = np.array([[0.5, 0.5]])
+
+    with pytest.raises(ValueError):
+        transform_corners(points, source_corners=corners, dest_corners=square)
+
+    with pytest.raises(ValueError):
+        transform_corners(points, source_corners=square, dest_corners=corners)
+
+    with pytest.raises(ValueError, match=r"\[\[1\]\]"):
+        transform_corners_batch(
+            np.stack([points, points]),
+            source_corners=np.stack([square, corners]),
+            dest_corners=np.stack([square, square]),
+        )
+
+
+@given(
+    corner_pairs=st.lists(
+        st.tuples(quad_corners(), quad_corners()), min_size=1, max_size=5
+    ),
+)
+def test_corners_map_to_corners(corner_pairs):
+    """
+    Checks that the closed-form homography maps each source corner onto
+    its corresponding destination corner.
+    """
+    for source_corners, dest_corners in corner_pairs:
+        actual = transform_corners(
+            source_corners, source_corners=source_corners, dest_corners=dest_corners
+        )
+        assert_allclose(actual=actual, desired=dest_corners, atol=1e-6, rtol=1e-6)
+
+    source_corners = np.stack([src for src, _ in corner_pairs])
+    dest_corners = np.stack([dst for _, dst in corner_pairs])
+    actual = transform_corners_batch(
+        source_corners, source_corners=source_corners, dest_corners=dest_corners
+    )
+    assert_allclose(actual=actual, desired=dest_corners, atol=1e-6, rtol=1e-6)
+
+
+@given(
+    source_corners=quad_corners(),
+    dest_corners=quad_corners(),
+    num_points=st.integers(4, 20),
+    data=st.data(),
+)
+def test_estimate_homography_recovers_exact_mapping(
+    source_corners: np.ndarray,
+    dest_corners: np.ndarray,
+    num_points: int,
+    data: st.DataObject,
+):
+    # sample source points from within the quadrilateral, so that
+    # the correspondences are well-conditioned
+    weights = data.draw(
+        hnp.arrays(
+            shape=(num_points, 4), dtype=np.float64, elements=st.floats(0.1, 1.0)
+        ),
+        label="weights",
+    )
+    source_points = (weights / weights.sum(axis=1, keepdims=True)) @ source_corners
+    dest_points = transform_corners(
+        source_points, source_corners=source_corners, dest_corners=dest_corners
+    )
+
+    homography = estimate_homography(
+        np.vstack([source_corners, source_points]),
+        np.vstack([dest_corners, dest_points]),
+    )
+    assert_allclose(
+        actual=homography.apply(source_points),
+        desired=dest_points,
+        atol=1e-6,
+        rtol=1e-6,
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_ransac_homography_rejects_outliers(seed: int):
+    rng = np.random.RandomState(seed)
+    source_corners = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0]])
+    dest_corners = np.array([[1.0, 2.0], [12.0, 1.0], [11.0, 13.0], [-1.0, 9.0]])
+
+    source_points = rng.uniform(0, 10, size=(200, 2))
+    dest_points = transform_corners(
+        source_points, source_corners=source_corners, dest_corners=dest_corners
+    )
+    dest_points += rng.normal(scale=1e-3, size=dest_points.shape)
+
+    # corrupt 30% of the correspondences
+    is_outlier = rng.rand(len(source_points)) < 0.3
+    dest_points[is_outlier] = rng.uniform(-20, 20, size=(is_outlier.sum(), 2))
+
+    homography, inliers = ransac_homography(
+        source_points, dest_points, threshold=0.05, max_iters=500, seed=seed
+    )
+
+    assert np.all(inliers[~is_outlier])
+    assert not np.any(inliers[is_outlier])
+    assert_allclose(
+        actual=homography.apply(source_corners), desired=dest_corners, atol=1e-2
+    )
+
+    # the result is reproducible for a given seed
+    homography2, inliers2 = ransac_homography(
+        source_points, dest_points, threshold=0.05, max_iters=500, seed=seed
+    )
+    assert_allclose(homography.matrix, homography2.matrix)
+    assert np.array_equal(inliers, inliers2)
+
+
+def test_estimate_homography_many_correspondences():
+    rng = np.random.RandomState(0)
+    source_corners = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0]])
+    dest_corners = np.array([[1.0, 2.0], [12.0, 1.0], [11.0, 13.0], [-1.0, 9.0]])
+
+    source_points = rng.uniform(0, 10, size=(20000, 2))
+    dest_points = transform_corners(
+        source_points, source_corners=source_corners, dest_corners=dest_corners
+    )
+    dest_points += rng.normal(scale=1e-3, size=dest_points.shape)
+
+    homography = estimate_homography(source_points, dest_points)
+    assert_allclose(
+        actual=homography.apply(source_corners), desired=dest_corners, atol=1e-3
+    )
+
+
+def test_estimate_homography_collinear_raises():
+    points = np.array([[0.0, 0.0], [1.0, 1.0], [2.0, 2.0], [3.0, 3.0], [4.0, 4.0]])
+    with pytest.raises(ValueError):
+        estimate_homography(points, points)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from plymi_mod6.homography import Homography
+from plymi_mod6.point_set import PointSet
+from plymi_mod6.transforms import rotate, scale, shear, translate
+
+
+def test_lazy_chain_matches_eager_transforms():
+    points = np.random.RandomState(0).uniform(-10, 10, size=(50, 2))
+    source = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    dest = np.array([[0.0, 0.0], [2.0, 0.2], [1.8, 1.5], [0.1, 1.0]])
+    homography = Homography(source, dest)
+
+    desired = translate(points, x_shift=1.0, y_shift=-2.0)
+    desired = rotate(desired, 30.0)
+    desired = shear(desired, x_shear=0.1, y_shear=0.2)
+    desired = scale(desired, x_scale=2.0, y_scale=0.5)
+    desired = homography.apply(desired)
+
+    point_set = PointSet(points)
+    (
+        point_set.translate(x_shift=1.0, y_shift=-2.0)
+        .rotate(30.0)
+        .shear(x_shear=0.1, y_shear=0.2)
+        .scale(x_scale=2.0, y_scale=0.5)
+        .then(homography)
+    )
+    # nothing is computed until the points are accessed
+    assert_allclose(point_set._points, points)
+
+    assert_allclose(point_set.points, desired, atol=1e-10)
+    assert_allclose(np.asarray(point_set), desired, atol=1e-10)
+    assert_allclose(point_set.pending.matrix, np.eye(3))
+    # the input array was copied, not modified
+    assert not np.shares_memory(point_set.points, points)
+
+
+def test_float32_storage_and_no_copy():
+    points = np.random.RandomState(1).uniform(-10, 10, size=(20, 2))
+    desired = rotate(points, 45.0)
+
+    point_set = PointSet(points, dtype=np.float32)
+    assert point_set.dtype == np.float32
+    point_set.rotate(45.0)
+    assert point_set.points.dtype == np.float32
+    assert_allclose(point_set.points, desired, rtol=1e-5, atol=1e-5)
+
+    buffer = points.copy()
+    point_set = PointSet(buffer, copy=False).rotate(45.0)
+    assert point_set.points is buffer
+    assert_allclose(buffer, desired)
+
+
+def test_copy_is_independent():
+    point_set = PointSet(np.ones((3, 2)), dtype=np.float32)
+    point_set.translate(x_shift=1.0, y_shift=0.0)
+    other = point_set.copy().scale(x_scale=2.0, y_scale=2.0)
+    assert other.dtype == np.float32
+    assert_allclose(point_set.points, [[2.0, 1.0]] * 3)
+    assert_allclose(other.points, [[4.0, 2.0]] * 3)
+
+
+@pytest.mark.parametrize("dtype", [np.int64, np.complex128])
+def test_non_float_storage_raises(dtype):
+    with pytest.raises(ValueError):
+        PointSet(np.zeros((3, 2)), dtype=dtype)
+
+
+def test_slots():
+    point_set = PointSet(np.zeros((3, 2)))
+    with pytest.raises(AttributeError):
+        point_set.foo = 1
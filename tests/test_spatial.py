@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from plymi_mod6.numpy_functions import knn
+from plymi_mod6 import spatial
+from plymi_mod6.spatial import GridIndex
+
+
+def _reference_dists(x, y):
+    return np.sqrt(np.sum((x[:, np.newaxis] - y) ** 2, axis=-1))
+
+
+@pytest.mark.parametrize("dim", [1, 2, 3, 5])
+@pytest.mark.parametrize("cell_size", [None, 0.05, 0.5])
+@pytest.mark.parametrize("radius", [0.0, 0.1, 0.3])
+def test_query_radius_matches_brute_force(dim: int, cell_size, radius: float):
+    rng = np.random.RandomState(0)
+    points = rng.rand(300, dim)
+    # include queries that lie outside of the grid
+    queries = rng.uniform(-0.5, 1.5, size=(40, dim))
+    queries[0] = points[0]
+
+    index = GridIndex(points, cell_size=cell_size)
+    assert index.is_gridded == (dim <= 3)
+    indptr, indices, dists = index.query_radius(queries, radius)
+
+    full = _reference_dists(queries, points)
+    assert indptr.shape == (41,)
+    for i in range(len(queries)):
+        (expected,) = np.nonzero(full[i] <= radius)
+        assert_array_equal(indices[indptr[i] : indptr[i + 1]], expected)
+        assert_allclose(dists[indptr[i] : indptr[i + 1]], full[i, expected], atol=1e-7)
+
+
+@pytest.mark.parametrize("dim", [1, 2, 3, 5])
+@pytest.mark.parametrize("k", [1, 4, 50])
+def test_query_knn_matches_brute_force(dim: int, k: int):
+    rng = np.random.RandomState(1)
+    points = rng.rand(200, dim)
+    queries = np.concatenate([rng.rand(30, dim), rng.uniform(5, 10, size=(3, dim))])
+
+    dists, indices = GridIndex(points, cell_size=0.02).query_knn(queries, k)
+    expected_dists, expected_indices = knn(queries, points, k)
+    assert_array_equal(indices, expected_indices)
+    assert_allclose(dists, expected_dists, atol=1e-7)
+
+
+def test_query_radius_on_clustered_points(monkeypatch):
+    # a dense cluster and a sparse spread of points: the default cell size is
+    # dominated by the spread, so nearly all points share a single cell
+    rng = np.random.RandomState(3)
+    points = np.concatenate([rng.rand(2000, 2) * 1e-3, rng.rand(300, 2)])
+    queries = np.concatenate([rng.rand(50, 2) * 1e-3, rng.rand(50, 2)])
+    index = GridIndex(points)
+
+    examined = []
+    radius_pairs = index._radius_pairs
+
+    def recording_radius_pairs(x, radius, queries, cell):
+        examined.append(index._cell_counts[cell].sum())
+        return radius_pairs(x, radius, queries, cell)
+
+    monkeypatch.setattr(spatial, "_CANDIDATE_BUDGET", 100)
+    monkeypatch.setattr(index, "_radius_pairs", recording_radius_pairs)
+    indptr, indices, dists = index.query_radius(queries, 2e-5)
+
+    # the clustered queries are answered by brute force, and the candidates of the
+    # remaining queries are examined in budget-sized pieces
+    assert 0 < sum(examined) < 50 * len(points) * spatial._BRUTE_FORCE_FRACTION
+    assert max(examined) <= 100 + index._cell_counts.max()
+
+    full = _reference_dists(queries, points)
+    for i in range(len(queries)):
+        (expected,) = np.nonzero(full[i] <= 2e-5)
+        assert_array_equal(indices[indptr[i] : indptr[i + 1]], expected)
+        assert_allclose(dists[indptr[i] : indptr[i + 1]], full[i, expected], atol=1e-7)
+
+
+def test_duplicate_points():
+    points = np.zeros((10, 2))
+    index = GridIndex(points)
+    indptr, indices, _ = index.query_radius(np.zeros((1, 2)), 0.0)
+    assert_array_equal(indices, np.arange(10))
+    dists, _ = index.query_knn(np.ones((2, 2)), 3)
+    assert_allclose(dists, np.full((2, 3), np.sqrt(2)))
+
+
+def test_bad_inputs_raise():
+    index = GridIndex(np.random.RandomState(2).rand(10, 2))
+    with pytest.raises(ValueError):
+        index.query_radius(np.zeros((3, 3)), 0.1)
+    with pytest.raises(ValueError):
+        index.query_radius(np.zeros((3, 2)), -1.0)
+    with pytest.raises(ValueError):
+        index.query_knn(np.zeros((3, 2)), 11)
+    with pytest.raises(ValueError):
+        GridIndex(np.zeros((3, 2)), cell_size=0.0)
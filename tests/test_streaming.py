@@ -0,0 +1,76 @@
+from functools import partial
+
+import hypothesis.extra.numpy as hnp
+import hypothesis.strategies as st
+import numpy as np
+import pytest
+from hypothesis import given
+from numpy.testing import assert_allclose, assert_array_equal
+
+from plymi_mod6.homography import transform_corners
+from plymi_mod6.streaming import iter_chunks, map_chunks, stream_transform
+from plymi_mod6.transforms import rotate
+
+
+@given(
+    points=hnp.arrays(
+        shape=st.integers(0, 20).map(lambda x: (x, 2)),
+        dtype=np.float64,
+        elements=st.floats(-1e3, 1e3),
+    ),
+    chunk_size=st.integers(1, 25),
+)
+def test_iter_chunks_covers_array(points: np.ndarray, chunk_size: int):
+    chunks = list(iter_chunks(points, chunk_size=chunk_size))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    assert all(len(chunk) > 0 for chunk in chunks)
+    assert_array_equal(np.concatenate(chunks) if chunks else np.empty((0, 2)), points)
+
+
+@pytest.mark.usefixtures("cleandir")
+@pytest.mark.parametrize("num_points", [0, 1, 10, 101])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_stream_transform_matches_in_memory(num_points: int, chunk_size: int):
+    points = np.random.RandomState(0).uniform(-10, 10, size=(num_points, 2))
+    np.save("points.npy", points)
+
+    corners = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    transform = partial(
+        transform_corners, source_corners=corners, dest_corners=2 * corners + 1
+    )
+
+    out = stream_transform(
+        transform, "points.npy", "projected.npy", chunk_size=chunk_size
+    )
+    assert_allclose(out, transform(points))
+    assert_allclose(np.load("projected.npy"), transform(points))
+
+
+def test_map_chunks_pipeline():
+    points = np.random.RandomState(1).uniform(-10, 10, size=(50, 2))
+    chunks = iter_chunks(points, chunk_size=8)
+    chunks = map_chunks(lambda x: rotate(x, 30.0), chunks)
+    chunks = map_chunks(lambda x: rotate(x, -30.0), chunks)
+    assert_allclose(np.concatenate(list(chunks)), points, atol=1e-12)
+
+
+@pytest.mark.usefixtures("cleandir")
+def test_stream_transform_rejects_transforms_that_drop_rows():
+    points = np.arange(20.0).reshape(10, 2)
+    with pytest.raises(ValueError):
+        stream_transform(lambda c: c[:-1], points, "out.npy", chunk_size=4)
+    with pytest.raises(ValueError):
+        stream_transform(lambda c: np.zeros((1, 2)), points[:0], "out.npy")
+
+
+@pytest.mark.usefixtures("cleandir")
+def test_stream_transform_rejects_dest_that_is_source():
+    points = np.arange(20.0).reshape(10, 2)
+    np.save("points.npy", points)
+    with pytest.raises(ValueError):
+        stream_transform(lambda c: c + 1, "points.npy", "./points.npy")
+    with pytest.raises(ValueError):
+        stream_transform(
+            lambda c: c + 1, np.load("points.npy", mmap_mode="r"), "points.npy"
+        )
+    assert_array_equal(np.load("points.npy"), points)
@@ -5,9 +5,10 @@ import hypothesis.strategies as st
 import numpy as np
 import pytest
 from hypothesis import given
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_array_equal
 
-from plymi_mod6.transforms import rotate, translate, shear, scale
+from plymi_mod6.homography import Homography
+from plymi_mod6.transforms import Transform, rotate, translate, shear, scale
 
 
 @pytest.mark.parametrize(
@@ -89,3 +90,280 @@ def test_scaling_identity(x_scale: float, y_scale: float, num_points: int):
     points /= (x_scale, y_scale)
     points = scale(points, x_scale=x_scale, y_scale=y_scale)
     assert_allclose(actual=points, desired=np.ones_like(points), rtol=1e-10)
+
+
+@given(
+    points=hnp.arrays(
+        shape=st.integers(0, 10).map(lambda x: (x, 2)),
+        dtype=np.float64,
+        elements=st.floats(-1e3, 1e3),
+    ),
+    deg_rot=st.floats(-360, 360),
+    shift=st.tuples(st.floats(-1e3, 1e3), st.floats(-1e3, 1e3)),
+    shear_factors=st.tuples(st.floats(-10, 10), st.floats(-10, 10)),
+    scale_factors=st.tuples(st.floats(0.1, 10), st.floats(0.1, 10)),
+)
+def test_fused_transform_matches_sequential_calls(
+    points: np.ndarray, deg_rot: float, shift, shear_factors, scale_factors
+):
+    x_shift, y_shift = shift
+    x_shear, y_shear = shear_factors
+    x_scale, y_scale = scale_factors
+
+    desired = translate(points, x_shift=x_shift, y_shift=y_shift)
+    desired = rotate(desired, deg_rot)
+    desired = shear(desired, x_shear=x_shear, y_shear=y_shear)
+    desired = scale(desired, x_scale=x_scale, y_scale=y_scale)
+
+    fused = (
+        Transform()
+        .translate(x_shift=x_shift, y_shift=y_shift)
+        .rotate(deg_rot)
+        .shear(x_shear=x_shear, y_shear=y_shear)
+        .scale(x_scale=x_scale, y_scale=y_scale)
+    )
+    assert fused.is_affine
+    assert_allclose(fused.apply(points), desired, atol=1e-6, rtol=1e-9)
+
+    # composition via `@` applies the right-hand operand first
+    composed = Transform().scale(x_scale=x_scale, y_scale=y_scale) @ (
+        Transform().shear(x_shear=x_shear, y_shear=y_shear)
+        @ Transform().rotate(deg_rot)
+        @ Transform().translate(x_shift=x_shift, y_shift=y_shift)
+    )
+    assert_allclose(composed.matrix, fused.matrix, atol=1e-9)
+
+
+def test_transform_inverse_and_matrix_round_trip():
+    points = np.random.RandomState(0).uniform(-10, 10, size=(20, 2))
+    t = Transform().rotate(33.0).shear(x_shear=0.5, y_shear=-0.2).translate(
+        x_shift=3.0, y_shift=-1.0
+    )
+    assert_allclose(t.inverse().apply(t.apply(points)), points, atol=1e-12)
+
+    restored = Transform.from_matrix(t.matrix.tolist())
+    assert_allclose(restored.apply(points), t.apply(points))
+
+    out = points.copy()
+    assert t.apply(out, out=out) is out
+    assert_allclose(out, t.apply(points))
+
+    with pytest.raises(ValueError):
+        Transform().scale(x_scale=0.0, y_scale=1.0).inverse()
+
+
+def test_transform_interoperates_with_homography():
+    points = np.random.RandomState(1).uniform(0, 1, size=(20, 2))
+    source = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    dest = np.array([[0.0, 0.0], [2.0, 0.2], [1.8, 1.5], [0.1, 1.0]])
+    homography = Homography(source, dest)
+    t = Transform().rotate(10.0).translate(x_shift=0.1, y_shift=0.2)
+
+    desired = homography.apply(t.apply(points))
+    assert_allclose((homography @ t).apply(points), desired)
+    assert_allclose(t.then(homography).apply(points), desired)
+    assert not (homography @ t).is_affine
+
+    desired = t.apply(homography.apply(points))
+    assert_allclose((t @ homography).apply(points), desired)
+    assert_allclose((t @ homography).to_homography().apply(points), desired)
+    assert_allclose(
+        Transform.from_homography(homography).apply(points), homography.apply(points)
+    )
+
+
+@pytest.mark.parametrize(
+    "transform, params",
+    [
+        (translate, dict(x_shift=[1.0, -2.0, 0.5], y_shift=3.0)),
+        (rotate, dict(deg_rot=[0.0, 30.0, 90.0, -45.0])),
+        (shear, dict(x_shear=[0.0, 1.5], y_shear=[-0.5, 2.0])),
+        (scale, dict(x_scale=2.0, y_scale=[1.0, 0.5, -3.0])),
+    ],
+)
+def test_batched_params_match_loop(transform: Callable, params: dict):
+    points = np.random.RandomState(0).uniform(-10, 10, size=(7, 2))
+    arrays = np.broadcast_arrays(*(np.asarray(v) for v in params.values()))
+    desired = np.stack(
+        [
+            transform(points, **dict(zip(params, values)))
+            for values in zip(*(a.tolist() for a in arrays))
+        ]
+    )
+
+    actual = transform(points, **params)
+    assert actual.shape == (len(arrays[0]), 7, 2)
+    assert_allclose(actual, desired, atol=1e-12)
+
+    out = np.empty_like(desired)
+    assert transform(points, **params, out=out) is out
+    assert_allclose(out, desired, atol=1e-12)
+
+
+def test_batched_params_must_be_1d():
+    with pytest.raises(ValueError):
+        rotate(np.zeros((3, 2)), np.zeros((2, 2)))
+
+
+@pytest.mark.parametrize(
+    "transform, params",
+    [
+        (translate, dict(x_shift=1.5, y_shift=-2.0)),
+        (rotate, dict(deg_rot=30.0)),
+        (shear, dict(x_shear=0.5, y_shear=-1.0)),
+        (scale, dict(x_scale=2.5, y_scale=0.5)),
+    ],
+)
+def test_inplace_and_dtype_preservation(transform: Callable, params: dict):
+    points = np.random.RandomState(0).uniform(-10, 10, size=(7, 2))
+    desired = transform(points, **params)
+
+    points32 = points.astype(np.float32)
+    actual = transform(points32, **params)
+    assert actual.dtype == np.float32
+    assert_allclose(actual, desired, rtol=1e-5, atol=1e-5)
+
+    buffer = points.copy()
+    assert transform(buffer, **params, inplace=True) is buffer
+    assert_allclose(buffer, desired)
+
+    with pytest.raises(ValueError):
+        transform(points, **params, out=np.empty_like(points), inplace=True)
+
+    # inexact transforms of integer coordinates are carried out in float-64
+    integers = np.arange(14).reshape(7, 2)
+    assert transform(integers, **params).dtype == np.float64
+    with pytest.raises(ValueError):
+        transform(integers, **params, inplace=True)
+
+
+@pytest.mark.parametrize(
+    "transform, params",
+    [
+        (translate, dict(x_shift=3, y_shift=-2)),
+        (rotate, dict(deg_rot=90)),
+        (rotate, dict(deg_rot=[-180.0, 270.0])),
+        (shear, dict(x_shear=2, y_shear=0)),
+        (scale, dict(x_scale=-1, y_scale=4)),
+    ],
+)
+@pytest.mark.parametrize("dtype", [np.int8, np.int32, np.int64])
+def test_exact_transforms_of_integer_coordinates(
+    transform: Callable, params: dict, dtype
+):
+    points = np.arange(-7, 7, dtype=dtype).reshape(7, 2)
+    desired = transform(points.astype(np.float64), **params)
+
+    # integer coordinates are transformed in int-64, which cannot wrap around
+    actual = transform(points, **params)
+    assert actual.dtype == np.int64
+    assert_allclose(actual, desired, atol=1e-12)
+
+    if actual.shape == points.shape:
+        transform(points, **params, inplace=True)
+        assert points.dtype == dtype
+        assert_allclose(points, desired, atol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "transform, params, desired",
+    [
+        (translate, dict(x_shift=-5, y_shift=0), [[-4, 2], [-2, 4]]),
+        (rotate, dict(deg_rot=180), [[-1, -2], [-3, -4]]),
+        (rotate, dict(deg_rot=90), [[-2, 1], [-4, 3]]),
+        (scale, dict(x_scale=100, y_scale=1), [[100, 2], [300, 4]]),
+        (shear, dict(x_shear=-1, y_shear=0), [[-1, 2], [-1, 4]]),
+    ],
+)
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int8])
+def test_narrow_integer_coordinates_do_not_wrap_around(
+    transform: Callable, params: dict, desired, dtype
+):
+    points = np.array([[1, 2], [3, 4]], dtype=dtype)
+    actual = transform(points, **params)
+    assert actual.dtype == np.int64
+    assert_array_equal(actual, desired)
+
+    # results that do not fit in the data type of `out` are not written to it
+    with pytest.raises(ValueError):
+        transform(points, **params, out=np.zeros((2, 2), dtype=np.uint8))
+    assert_array_equal(points, [[1, 2], [3, 4]])
+
+    out = np.zeros((2, 2), dtype=np.int16)
+    assert transform(points, **params, out=out) is out
+    assert_array_equal(out, desired)
+
+
+@pytest.mark.parametrize(
+    "deg_rot, expected_transform",
+    [
+        (-90, lambda x: x[:, ::-1] * (1, -1)),
+        (0, lambda x: x),
+        (90, lambda x: x[:, ::-1] * (-1, 1)),
+        (180, lambda x: -x),
+        (270, lambda x: x[:, ::-1] * (1, -1)),
+        (720, lambda x: x),
+    ],
+)
+@given(
+    points=hnp.arrays(
+        shape=st.integers(0, 10).map(lambda x: (x, 2)),
+        dtype=np.float64,
+        elements=st.floats(-1e10, 1e10),
+    )
+)
+def test_right_angle_rotations_are_exact(
+    points: np.ndarray,
+    deg_rot: float,
+    expected_transform: Callable[[np.ndarray], np.ndarray],
+):
+    desired = expected_transform(points)
+    assert_array_equal(rotate(points, deg_rot), desired)
+    assert_array_equal(rotate(points, [deg_rot, deg_rot])[1], desired)
+    assert_array_equal(Transform().rotate(deg_rot).apply(points), desired)
+
+    rotate(points, deg_rot, inplace=True)
+    assert_array_equal(points, desired)
+
+
+@pytest.mark.filterwarnings("ignore:invalid value encountered")
+@pytest.mark.parametrize("deg_rot", [np.inf, -np.inf, np.nan])
+def test_non_finite_rotations_produce_nan(deg_rot: float):
+    points = np.array([[1.0, 2.0], [3.0, 4.0]])
+    assert np.all(np.isnan(rotate(points, deg_rot)))
+
+    out = rotate(points, [deg_rot, 30.0])
+    assert np.all(np.isnan(out[0]))
+    assert_allclose(out[1], rotate(points, 30.0))
+
+
+@pytest.mark.parametrize(
+    "transform, params",
+    [
+        (translate, dict(x_shift=1.5, y_shift=-2)),
+        (rotate, dict(deg_rot=30.0)),
+        (rotate, dict(deg_rot=-90)),
+        (shear, dict(x_shear=0.5, y_shear=-1.0)),
+        (scale, dict(x_scale=2, y_scale=0.5)),
+    ],
+)
+def test_scalar_fast_path_matches_array_params(transform: Callable, params: dict):
+    points = np.random.RandomState(0).uniform(-10, 10, size=(7, 2))
+    desired = transform(points, **{k: np.array([v]) for k, v in params.items()})[0]
+
+    assert_allclose(transform(points, **params), desired, atol=1e-12)
+    assert_allclose(
+        transform(points, **{k: np.float64(v) for k, v in params.items()}),
+        desired,
+        atol=1e-12,
+    )
+    assert_allclose(
+        transform(points, **{k: np.array(v) for k, v in params.items()}),
+        desired,
+        atol=1e-12,
+    )
+
+    # the cached matrices must not be modified by the transforms
+    out = points.copy()
+    transform(out, **params, inplace=True)
+    assert_allclose(transform(points, **params), desired, atol=1e-12)
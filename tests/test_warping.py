@@ -0,0 +1,194 @@
+import os
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from plymi_mod6.warping import (
+    cached_remap_table,
+    compute_remap_table,
+    remap_key,
+    warp_image,
+)
+
+UNIT_SQUARE = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+
+
+def _random_image(shape, dtype):
+    rng = np.random.RandomState(0)
+    if np.issubdtype(dtype, np.integer):
+        return rng.randint(0, 256, size=shape).astype(dtype)
+    return rng.rand(*shape).astype(dtype)
+
+
+@pytest.mark.parametrize("interpolation", ["nearest", "bilinear"])
+@pytest.mark.parametrize("shape", [(17, 23), (17, 23, 3)])
+@pytest.mark.parametrize("dtype", [np.uint8, np.float32])
+def test_identity_warp(interpolation: str, shape, dtype):
+    image = _random_image(shape, dtype)
+    out = warp_image(
+        image, UNIT_SQUARE, UNIT_SQUARE, shape[:2], interpolation, tile_size=5
+    )
+    assert out.dtype == image.dtype
+    assert_array_equal(out, image)
+
+
+@pytest.mark.parametrize("interpolation", ["nearest", "bilinear"])
+def test_integer_translation(interpolation: str):
+    image = _random_image((10, 12, 2), np.uint8)
+    out = warp_image(
+        image,
+        UNIT_SQUARE,
+        UNIT_SQUARE + [3.0, 2.0],  # shift right by 3, down by 2
+        (10, 12),
+        interpolation,
+        fill_value=7,
+    )
+    assert_array_equal(out[2:, 3:], image[:-2, :-3])
+    assert np.all(out[:2] == 7)
+    assert np.all(out[:, :3] == 7)
+
+
+@pytest.mark.parametrize("interpolation", ["nearest", "bilinear"])
+def test_nan_fill_value_only_fills_outside_of_image(interpolation: str):
+    image = np.arange(16, dtype=np.float32).reshape(4, 4)
+    # shift right by half a pixel
+    out = warp_image(
+        image,
+        UNIT_SQUARE,
+        UNIT_SQUARE + [0.5, 0.0],
+        (4, 4),
+        interpolation,
+        fill_value=np.nan,
+    )
+    assert np.all(np.isnan(out[:, 0]) == (interpolation == "bilinear"))
+    assert not np.any(np.isnan(out[:, 1:]))
+    if interpolation == "bilinear":
+        assert_allclose(out[:, 1:], image[:, :-1] + 0.5)
+
+
+def test_bilinear_is_exact_for_linear_ramp():
+    rows, cols = np.mgrid[0:20, 0:20]
+    image = (2.0 * cols + 3.0 * rows).astype(np.float64)
+
+    # shift by a quarter pixel in x and a half pixel in y
+    out = warp_image(
+        image, UNIT_SQUARE, UNIT_SQUARE + [0.25, 0.5], (20, 20), "bilinear"
+    )
+    expected = 2.0 * (cols - 0.25) + 3.0 * (rows - 0.5)
+    assert_allclose(out[1:, 1:], expected[1:, 1:], atol=1e-5)
+
+
+@pytest.mark.parametrize("interpolation", ["nearest", "bilinear"])
+@pytest.mark.parametrize("tile_size", [1, 7, 64])
+@pytest.mark.parametrize("n_workers", [None, 4])
+def test_tiling_and_threads_do_not_affect_result(
+    interpolation: str, tile_size: int, n_workers
+):
+    image = _random_image((31, 29, 3), np.float32)
+    dest_corners = np.array([[2.0, 1.0], [25.0, 4.0], [27.0, 30.0], [0.0, 26.0]])
+    source_corners = np.array([[0.0, 0.0], [28.0, 0.0], [28.0, 30.0], [0.0, 30.0]])
+
+    expected = warp_image(
+        image, source_corners, dest_corners, (33, 35), interpolation, tile_size=1000
+    )
+    out = warp_image(
+        image,
+        source_corners,
+        dest_corners,
+        (33, 35),
+        interpolation,
+        tile_size=tile_size,
+        n_workers=n_workers,
+    )
+    assert_array_equal(out, expected)
+
+
+def test_bad_interpolation_raises():
+    with pytest.raises(ValueError):
+        warp_image(np.zeros((4, 4)), UNIT_SQUARE, UNIT_SQUARE, (4, 4), "cubic")
+
+
+@pytest.mark.parametrize("interpolation", ["nearest", "bilinear"])
+@pytest.mark.parametrize("shape", [(31, 29), (31, 29, 3)])
+def test_remap_table_matches_warp_image(interpolation: str, shape):
+    image = _random_image(shape, np.uint8)
+    dest_corners = np.array([[2.0, 1.0], [25.0, 4.0], [27.0, 30.0], [0.0, 26.0]])
+    source_corners = np.array([[0.0, 0.0], [28.0, 0.0], [28.0, 30.0], [0.0, 30.0]])
+
+    table = compute_remap_table(
+        source_corners, dest_corners, shape[:2], (33, 35), interpolation, tile_size=8
+    )
+    assert table.indices.dtype == np.int32
+    expected = warp_image(
+        image, source_corners, dest_corners, (33, 35), interpolation, fill_value=3
+    )
+    assert_array_equal(table.apply(image, fill_value=3), expected)
+
+    # a non-contiguous `out` is written to, rather than a copy of it
+    big = np.full((33, 40) + shape[2:], 255, dtype=np.uint8)
+    out = big[:, :35]
+    assert table.apply(image, fill_value=3, out=out) is out
+    assert_array_equal(big[:, :35], expected)
+    assert np.all(big[:, 35:] == 255)
+
+
+@pytest.mark.usefixtures("cleandir")
+@pytest.mark.parametrize("interpolation", ["nearest", "bilinear"])
+def test_cached_remap_table_round_trip(interpolation: str):
+    image = _random_image((12, 10, 3), np.float32)
+    dest_corners = UNIT_SQUARE * 1.5 + [0.5, 0.25]
+
+    table = cached_remap_table(
+        UNIT_SQUARE, dest_corners, (12, 10), (15, 14), interpolation, cache_dir="cache"
+    )
+    key = remap_key(UNIT_SQUARE, dest_corners, (12, 10), (15, 14), interpolation)
+    assert os.listdir("cache") == ["remap-{}.npz".format(key)]
+
+    loaded = cached_remap_table(
+        UNIT_SQUARE, dest_corners, (12, 10), (15, 14), interpolation, cache_dir="cache"
+    )
+    assert loaded.interpolation == interpolation
+    assert_array_equal(loaded.indices, table.indices)
+    assert_array_equal(loaded.apply(image), table.apply(image))
+
+    # a different output shape is keyed separately
+    cached_remap_table(
+        UNIT_SQUARE, dest_corners, (12, 10), (15, 15), interpolation, cache_dir="cache"
+    )
+    assert len(os.listdir("cache")) == 2
+
+
+@pytest.mark.usefixtures("cleandir")
+def test_cached_remap_table_is_not_left_truncated(monkeypatch):
+    def failing_savez(file, **arrays):
+        with open(file, "wb") as f:
+            f.write(b"PK")  # a partial write
+        raise KeyboardInterrupt
+
+    args = (UNIT_SQUARE, UNIT_SQUARE * 2, (12, 10), (15, 14), "bilinear")
+    with monkeypatch.context() as m:
+        m.setattr(np, "savez", failing_savez)
+        with pytest.raises(KeyboardInterrupt):
+            cached_remap_table(*args, cache_dir="cache")
+    assert os.listdir("cache") == []
+
+    table = cached_remap_table(*args, cache_dir="cache")
+    loaded = cached_remap_table(*args, cache_dir="cache")
+    assert_array_equal(loaded.indices, table.indices)
+
+
+def test_remap_table_apply_with_nan_fill_value():
+    image = _random_image((12, 10), np.float32)
+    corners = (UNIT_SQUARE, UNIT_SQUARE + [0.5, 0.25])
+    table = compute_remap_table(*corners, (12, 10), (12, 10), "bilinear")
+    out = table.apply(image, fill_value=np.nan)
+    assert np.all(np.isnan(out[0])) and np.all(np.isnan(out[:, 0]))
+    expected = warp_image(image, *corners, (12, 10), "bilinear")
+    assert_allclose(out[1:, 1:], expected[1:, 1:])
+
+
+def test_remap_table_rejects_mismatched_image():
+    table = compute_remap_table(UNIT_SQUARE, UNIT_SQUARE, (4, 4), (4, 4))
+    with pytest.raises(ValueError):
+        table.apply(np.zeros((5, 4)))